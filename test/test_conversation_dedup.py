@@ -0,0 +1,56 @@
+import json
+import logging
+import time
+from unittest import mock
+
+from xiaomusic.config import Config
+from xiaomusic.conversation import ConversationPoller
+
+
+class FakeDeviceManager:
+    def get_did(self, device_id):
+        return "d1"
+
+
+class FakeAuthManager:
+    cookie_jar = None
+
+
+def page(*records):
+    return {
+        "data": json.dumps(
+            {"records": [{"time": t, "query": q, "answers": []} for t, q in records]}
+        )
+    }
+
+
+def take_all(poller):
+    records = []
+    while not poller.record_queue.empty():
+        record = poller.record_queue.get_nowait()
+        records.append((record["time"], record["query"]))
+    return records
+
+
+if __name__ == "__main__":
+    poller = ConversationPoller(
+        Config(), logging.getLogger(), FakeAuthManager(), FakeDeviceManager()
+    )
+    poller.last_timestamp = {"d1": 100}
+
+    # 同一时间戳的不同记录都要处理，更早的记录不处理
+    first_page = page((103, "暂停"), (103, "下一首"), (102, "上一首"), (99, "旧记录"))
+    poller._get_last_query("id1", first_page)
+    assert take_all(poller) == [(102, "上一首"), (103, "暂停"), (103, "下一首")]
+
+    # 过了很久再拉到同一页，也不会重复处理
+    now = time.time()
+    with mock.patch("time.time", return_value=now + 3600):
+        poller._get_last_query("id1", first_page)
+    assert take_all(poller) == []
+
+    # 有了更新的记录后，同一时间戳的记录集合重新开始
+    poller._get_last_query("id1", page((104, "暂停"), (103, "下一首")))
+    assert take_all(poller) == [(104, "暂停")]
+    assert poller._last_records["d1"] == {(104, "暂停")}
+    print("对话记录去重检查通过")
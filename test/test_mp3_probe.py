@@ -0,0 +1,37 @@
+import struct
+
+from xiaomusic.utils.music_utils import parse_mp3_duration
+
+# MPEG1 Layer3 128kbps 44100Hz，帧长 417 字节
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LEN = 417
+
+
+def wav_bytes(pcm: bytes) -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, 2, 44100, 44100 * 4, 4, 16)
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + len(pcm))
+        + b"WAVEfmt "
+        + struct.pack("<I", len(fmt))
+        + fmt
+        + b"data"
+        + struct.pack("<I", len(pcm))
+        + pcm
+    )
+
+
+if __name__ == "__main__":
+    # CBR MP3：连续的有效帧，按文件大小估算
+    mp3 = (FRAME_HEADER + bytes(FRAME_LEN - 4)) * 10
+    file_size = 128000 // 8 * 60
+    duration = parse_mp3_duration(mp3, 0, file_size)
+    assert abs(duration - 60) < 0.1, duration
+    print("MP3 时长检查通过", duration)
+
+    # PCM 数据里偶然出现的帧同步字，后面没有第二个有效帧，不是 MP3
+    pcm = bytes(4000) + FRAME_HEADER + bytes(100)
+    assert parse_mp3_duration(wav_bytes(pcm), 0, 10_000_000) == 0
+    pcm = bytes(4000) + FRAME_HEADER + bytes(FRAME_LEN * 2)
+    assert parse_mp3_duration(wav_bytes(pcm), 0, 10_000_000) == 0
+    print("非 MP3 数据检查通过")
@@ -0,0 +1,34 @@
+import time
+
+from xiaomusic.play_queue import PlayQueue, ShufflePermutation, SortedMusicList
+
+
+def check_permutation(n, seed):
+    perm = ShufflePermutation(n, seed)
+    order = [perm.forward(i) for i in range(n)]
+    assert sorted(order) == list(range(n)), f"n={n} 不是置换"
+    for i, j in enumerate(order):
+        assert perm.inverse(j) == i, f"n={n} 反向置换错误"
+
+
+if __name__ == "__main__":
+    for n in [1, 2, 3, 10, 17, 1000]:
+        check_permutation(n, 12345)
+    print("置换检查通过")
+
+    songs = [f"歌曲{i}" for i in range(100000)]
+    start = time.perf_counter()
+    base = SortedMusicList(songs)
+    print(f"排序 {len(base)} 首歌, 耗时 {time.perf_counter() - start:.3f} 秒")
+
+    start = time.perf_counter()
+    queues = [PlayQueue(base, shuffle=True) for _ in range(50)]
+    print(f"创建 50 个随机队列, 耗时 {time.perf_counter() - start:.6f} 秒")
+
+    queue = queues[0]
+    print("前 5 首:", queue[:5])
+    name = queue[100]
+    assert queue.index(name) == 100
+    queue.append("新下载的歌")
+    assert queue[-1] == "新下载的歌" and "新下载的歌" in queue
+    print("队列检查通过", len(queue))
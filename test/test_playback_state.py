@@ -0,0 +1,42 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from xiaomusic.config import Config, Device
+from xiaomusic.device_player import XiaoMusicDevice
+from xiaomusic.xiaomusic import XiaoMusic
+
+
+async def main(tmp):
+    config = Config(
+        conf_path=os.path.join(tmp, "conf"),
+        music_path=os.path.join(tmp, "music"),
+        download_path=os.path.join(tmp, "music", "download"),
+        cache_dir=os.path.join(tmp, "music", "cache"),
+        temp_path=os.path.join(tmp, "music", "tmp"),
+        enable_analytics=False,
+        continue_play=True,
+    )
+    os.makedirs(config.conf_path, exist_ok=True)
+    xiaomusic = XiaoMusic(config)
+    device = XiaoMusicDevice(xiaomusic, Device(did="d1", device_id="id1"), "g")
+
+    device.is_playing = True
+    device._start_time = time.time()
+    device._duration = 200
+    device._sync_playback_state()
+    version = device.playback_state.version
+
+    # 小爱回答期间暂停，快照的播放进度要跟着更新
+    await device.reset_timer_when_answer(20)
+    assert device.playback_state.version > version
+    assert device.playback_state.paused_time == device._paused_time
+    print("回答后播放状态版本号", version, "->", device.playback_state.version)
+    device.cancel_all_timer()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        asyncio.run(main(tmp))
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+
+from xiaomusic.playlist_store import PlaylistStore
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "playlists.db")
+        store = PlaylistStore(filename)
+
+        # 旧格式导入导出
+        music_list_json = json.dumps(
+            [
+                {
+                    "name": "电台",
+                    "musics": [
+                        {"name": "电台1", "url": "http://x/1.m3u8", "type": "radio"}
+                    ],
+                },
+                {"name": "网络歌单", "musics": []},
+            ],
+            ensure_ascii=False,
+        )
+        store.import_music_list_json(music_list_json)
+        assert json.loads(store.export_music_list_json()) == json.loads(music_list_json)
+        store.import_custom_play_list_json('{"收藏": ["歌曲1"], "其他": []}')
+        print("导入导出检查通过")
+
+        # 单个歌单更新，顺序保持不变
+        store.set_custom_play_list("收藏", ["歌曲1", "歌曲2"])
+        store.set_custom_play_list("新歌单", [])
+        store.rename_custom_play_list("其他", "其他2")
+        store.delete_custom_play_list("新歌单")
+        store.close()
+
+        store = PlaylistStore(filename)
+        assert store.get_custom_play_lists() == {
+            "收藏": ["歌曲1", "歌曲2"],
+            "其他2": [],
+        }
+        assert list(store.get_web_music_lists()) == ["电台", "网络歌单"]
+        # 改名后的歌单排到最后，重新打开后顺序不变
+        store.rename_custom_play_list("收藏", "收藏2")
+        assert list(store.get_custom_play_lists()) == ["其他2", "收藏2"]
+        print("歌单更新检查通过", store.export_custom_play_list_json())
+
+        try:
+            store.import_music_list_json('["电台"]')
+        except ValueError as e:
+            print("格式错误检查通过", e)
+        else:
+            raise AssertionError("歌单不是对象时应报错")
+        assert list(store.get_web_music_lists()) == ["电台", "网络歌单"]
+        store.close()
+
+        store = PlaylistStore(filename)
+        assert list(store.get_custom_play_lists()) == ["其他2", "收藏2"]
+        store.close()
@@ -0,0 +1,40 @@
+import asyncio
+
+from xiaomusic.tag_job_queue import PRIORITY_BULK, PRIORITY_UI, TagJobQueue
+
+
+def fail():
+    raise ValueError("标签解析失败")
+
+
+async def cancelled():
+    raise asyncio.CancelledError()
+
+
+async def main():
+    queue = TagJobQueue()
+
+    # 任务抛出异常，提交方收到同样的异常
+    try:
+        await queue.submit(PRIORITY_BULK, fail)
+    except ValueError as e:
+        print("任务异常检查通过", e)
+    else:
+        raise AssertionError("应抛出任务的异常")
+
+    # 任务抛出 CancelledError，提交方的等待被取消，工作协程继续运行
+    try:
+        await asyncio.wait_for(queue.submit(PRIORITY_BULK, cancelled), 1)
+    except asyncio.CancelledError:
+        print("任务取消检查通过")
+    else:
+        raise AssertionError("应取消提交方的等待")
+
+    # 之后提交的任务照常执行
+    result = await asyncio.wait_for(queue.submit(PRIORITY_UI, lambda: "ok"), 1)
+    assert result == "ok" and queue.pending == 0
+    print("后续任务检查通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
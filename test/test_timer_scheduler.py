@@ -0,0 +1,31 @@
+import asyncio
+
+from xiaomusic.timer_scheduler import TimerScheduler
+
+
+async def main():
+    scheduler = TimerScheduler()
+    fired = []
+
+    async def on_timer(name):
+        fired.append(name)
+
+    # 频繁重设同一个定时器，堆中的失效条目会被清理
+    for i in range(10000):
+        scheduler.call_later(("d1", "next"), 100 + i, on_timer, "next")
+        scheduler.call_later(("d1", "stop"), 100, on_timer, "stop")
+        scheduler.cancel(("d1", "stop"))
+    assert len(scheduler._heap) < 200, len(scheduler._heap)
+    print("重设后堆大小", len(scheduler._heap))
+
+    # 清理后定时器仍然按时触发
+    scheduler.call_later(("d1", "next"), 0.05, on_timer, "next")
+    scheduler.call_later(("d2", "tts"), 0.01, on_timer, "tts")
+    await asyncio.sleep(0.2)
+    assert fired == ["tts", "next"], fired
+    assert scheduler.snapshot() == []
+    print("定时器触发检查通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+import time
+
+from xiaomusic.config import Config
+from xiaomusic.utils.music_utils import get_web_music_duration
+
+
+async def main(urls):
+    config = Config()
+    for url in urls:
+        # 获取网络歌曲时长（优先只读取文件头）
+        start = time.perf_counter()
+        duration, real_url = await get_web_music_duration(url, config)
+        cost = time.perf_counter() - start
+        print(f"网络歌曲 : {real_url} 的时长 {duration} 秒, 耗时 {cost:.3f} 秒")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    urls = [
+        "http://192.168.2.5:58090/static/search.mp3",  # 替换为你的网络歌曲链接
+    ]
+    asyncio.run(main(urls))
@@ -14,6 +14,7 @@ from xiaomusic.api.dependencies import (
     AuthStaticFiles,
     reset_http_server,
 )
+from xiaomusic.utils.http_client import close_session
 
 if TYPE_CHECKING:
     from xiaomusic.xiaomusic import XiaoMusic
@@ -45,6 +46,12 @@ async def app_lifespan(app):
             except Exception as e:
                 if _state.is_initialized():
                     _state._log.error(f"Background task cleanup error: {e}")
+        # 投递还在合并窗口中的事件，并写入待保存的配置和缓存，避免丢失最后一次修改
+        if _state.is_initialized():
+            await _state._xiaomusic.event_bus.flush()
+            _state._xiaomusic.config_manager.flush()
+            _state._xiaomusic.flush_caches()
+        await close_session()
 
 
 # 创建 FastAPI 应用实例
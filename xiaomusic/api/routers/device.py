@@ -1,12 +1,15 @@
 """设备控制路由"""
 
 import asyncio
+import time
 import urllib.parse
 
 from fastapi import (
     APIRouter,
     Depends,
+    Request,
 )
+from fastapi.responses import JSONResponse, Response
 
 from xiaomusic.api.dependencies import (
     log,
@@ -54,6 +57,67 @@ async def getplayerstatus(did: str = ""):
     return await xiaomusic.get_player_status(did=did)
 
 
+@router.get("/playtimings")
+async def playtimings(did: str = ""):
+    """最近一次播放各阶段耗时（秒）
+
+    阶段包括 cancel_timer、url、duration、force_stop、play 和 total，
+    使用预取结果播放时只有 cancel_timer、play 和 total。
+    """
+    if not xiaomusic.did_exist(did):
+        return {"ret": "Did not exist"}
+
+    return {"ret": "OK", "timings": xiaomusic.get_play_timings(did)}
+
+
+@router.get("/timers")
+async def timers():
+    """所有设备待触发的定时器
+
+    name 包括 next（下一首）、prefetch（预取下一首）、stop（定时关机）、
+    tts（TTS 播放结束）。remaining 为剩余秒数。
+    """
+    return {"ret": "OK", "timers": xiaomusic.get_timers()}
+
+
+@router.get("/groupsyncstats")
+async def groupsyncstats():
+    """各分组的播放同步统计
+
+    skew 为一次组播放中各设备开始播放时间的最大差值(秒)，
+    latency 为各设备播放命令耗时的滑动平均(秒)，用于错开发送时间。
+    """
+    return {"ret": "OK", "groups": xiaomusic.get_group_sync_stats()}
+
+
+@router.get("/httpstats")
+async def httpstats():
+    """共享 HTTP 连接池统计
+
+    reused_connections 为复用已有连接的请求数，queued 为等待空闲连接的次数。
+    """
+    return {"ret": "OK", "stats": xiaomusic.get_http_stats()}
+
+
+@router.get("/api/devices/state")
+async def devices_state(request: Request):
+    """所有设备的播放状态
+
+    支持 If-None-Match，状态没有变化时返回 304。offset 是生成响应时的播放位置，
+    收到 304 时可以用 start_time、paused_time 和 server_time 自行推算。
+    """
+    etag, devices = xiaomusic.get_devices_state()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(
+        {"ret": "OK", "server_time": time.time(), "devices": devices},
+        headers=headers,
+    )
+
+
 @router.post("/setvolume")
 async def setvolume(data: DidVolume):
     """设置音量"""
@@ -224,7 +224,7 @@ async def musicinfos(
 @router.post("/setmusictag")
 async def setmusictag(info: MusicInfoObj):
     """设置音乐标签"""
-    ret = xiaomusic.music_library.set_music_tag(info.musicname, info)
+    ret = await xiaomusic.music_library.set_music_tag(info.musicname, info)
     return {"ret": ret}
 
 
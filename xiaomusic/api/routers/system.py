@@ -121,6 +121,11 @@ async def getsetting(need_device_list: bool = False):
     data = asdict(config_data)
     data["password"] = "******"
     data["httpauth_password"] = "******"
+    # 歌单保存在歌单数据库，按原来的 JSON 格式导出
+    data["music_list_json"] = xiaomusic.music_library.export_music_list_json()
+    data["custom_play_list_json"] = (
+        xiaomusic.music_library.export_custom_play_list_json()
+    )
     if need_device_list:
         device_list = await xiaomusic.getalldevices()
         log.info(f"getsetting device_list: {device_list}")
@@ -155,6 +160,9 @@ async def savesetting(request: Request):
         return "save success"
     except json.JSONDecodeError as err:
         raise HTTPException(status_code=400, detail="Invalid JSON") from err
+    except ValueError as err:
+        # 歌单 JSON 格式不对
+        raise HTTPException(status_code=400, detail=str(err)) from err
 
 
 @router.post("/api/system/modifiysetting")
@@ -183,6 +191,9 @@ async def modifiysetting(request: Request):
             config_obj.is_http_server_config(key) for key in data.keys()
         )
 
+        # 歌单 JSON 导入歌单数据库
+        xiaomusic.import_playlists_from_setting(data)
+
         # 更新配置
         config_obj.update_config(data)
 
@@ -200,6 +211,9 @@ async def modifiysetting(request: Request):
         return {"success": True, "message": "Configuration updated successfully"}
     except json.JSONDecodeError as err:
         raise HTTPException(status_code=400, detail="Invalid JSON") from err
+    except ValueError as err:
+        # 歌单 JSON 格式不对
+        raise HTTPException(status_code=400, detail=str(err)) from err
     except Exception as err:
         log.error(f"Error updating configuration: {err}")
         raise HTTPException(status_code=500, detail=str(err)) from err
@@ -1,7 +1,6 @@
 """WebSocket 相关功能"""
 
 import asyncio
-import json
 import secrets
 import time
 
@@ -14,6 +13,7 @@ from fastapi import (
 )
 
 from xiaomusic.api.dependencies import (
+    log,
     verification,
     xiaomusic,
 )
@@ -48,6 +48,14 @@ def generate_ws_token(
     }
 
 
+async def _wait_disconnect(websocket: WebSocket):
+    """等待客户端断开连接，客户端发来的其他消息直接忽略"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
 @router.websocket("/ws/playingmusic")
 async def ws_playingmusic(websocket: WebSocket):
     """WebSocket 播放状态推送"""
@@ -68,26 +76,26 @@ async def ws_playingmusic(websocket: WebSocket):
 
         await websocket.accept()
 
-        # 开始推送状态
-        while True:
-            is_playing = xiaomusic.isplaying(did)
-            cur_music = xiaomusic.playingmusic(did)
-            cur_playlist = xiaomusic.get_cur_play_list(did)
-            offset, duration = xiaomusic.get_offset_duration(did)
-
-            await websocket.send_text(
-                json.dumps(
-                    {
-                        "ret": "OK",
-                        "is_playing": is_playing,
-                        "cur_music": cur_music,
-                        "cur_playlist": cur_playlist,
-                        "offset": offset,
-                        "duration": duration,
-                    }
+        # 状态变化时推送，没有变化时只按心跳间隔推送，进度由客户端推算
+        # 同时等待断开消息，客户端断开后立即取消订阅，不必等到下一次推送失败
+        subscriber = xiaomusic.playback_broadcaster.subscribe(did)
+        disconnect_task = asyncio.create_task(_wait_disconnect(websocket))
+        try:
+            while True:
+                get_task = asyncio.create_task(subscriber.get())
+                await asyncio.wait(
+                    {get_task, disconnect_task},
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
-            )
-            await asyncio.sleep(1)
+                if disconnect_task.done():
+                    get_task.cancel()
+                    log.info(f"WebSocket disconnected: {did}")
+                    break
+                for message in get_task.result():
+                    await websocket.send_text(message)
+        finally:
+            disconnect_task.cancel()
+            xiaomusic.playback_broadcaster.unsubscribe(subscriber)
 
     except jwt.ExpiredSignatureError:
         await websocket.close(code=1008, reason="Token expired")
@@ -4,7 +4,6 @@
 """
 
 import asyncio
-import re
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -98,16 +97,12 @@ class CommandHandler:
                 return "exec", code
             return opvalue, ""
 
-        # 按优先级顺序进行模糊匹配
-        for opkey in self.config.key_match_order:
-            patternarg = rf"(.*){opkey}(.*)"
-            # 匹配参数
-            matcharg = re.match(patternarg, query)
-            if not matcharg:
-                continue
-
-            argpre = matcharg.groups()[0]
-            argafter = matcharg.groups()[1]
+        # 一次扫描找出出现的关键词，再按优先级顺序进行模糊匹配
+        active_cmd_set = self.config.get_active_cmd_set()
+        for opkey, start in self.config.get_key_matcher().find(query):
+            # 以关键词最后一次出现的位置分割参数
+            argpre = query[:start]
+            argafter = query[start + len(opkey) :]
             self.log.debug(
                 "matcharg. opkey:%s, argpre:%s, argafter:%s",
                 opkey,
@@ -123,13 +118,12 @@ class CommandHandler:
             opvalue = self.config.key_word_dict.get(opkey)
 
             # 检查是否在激活命令中
-            active_cmd_arr = self.config.get_active_cmd_arr()
             if (
                 not ctrl_panel
                 and not device.is_playing
-                and active_cmd_arr
-                and opvalue not in active_cmd_arr
-                and opkey not in active_cmd_arr
+                and active_cmd_set
+                and opvalue not in active_cmd_set
+                and opkey not in active_cmd_set
             ):
                 self.log.info(f"不在激活命令中 {opvalue}")
                 continue
@@ -158,16 +152,16 @@ class CommandHandler:
         Returns:
             str: 匹配的命令值，未匹配返回 None
         """
-        if query not in self.config.key_match_order:
+        if query not in self.config.get_key_matcher():
             return None
 
-        active_cmd_arr = self.config.get_active_cmd_arr()
+        active_cmd_set = self.config.get_active_cmd_set()
         opvalue = self.config.key_word_dict.get(query)
         # 控制面板/正在播放时允许执行/是否在激活命令中
         if (
             ctrl_panel
             or device.is_playing
-            or not active_cmd_arr
-            or opvalue in active_cmd_arr
+            or not active_cmd_set
+            or opvalue in active_cmd_set
         ):
             return opvalue
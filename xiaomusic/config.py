@@ -15,6 +15,7 @@ from xiaomusic.const import (
     PLAY_TYPE_SIN,
 )
 from xiaomusic.utils.system_utils import validate_proxy
+from xiaomusic.utils.text_utils import KeywordMatcher
 
 
 # 默认口令
@@ -126,6 +127,10 @@ class Config:
     disable_download: bool = (
         os.getenv("XIAOMUSIC_DISABLE_DOWNLOAD", "false").lower() == "true"
     )
+    # 下载歌曲时先播放源站音频流，下载完成后再切换到本地文件
+    enable_stream_download: bool = (
+        os.getenv("XIAOMUSIC_ENABLE_STREAM_DOWNLOAD", "false").lower() == "true"
+    )
     key_word_dict: dict[str, str] = field(default_factory=default_key_word_dict)
     key_match_order: list[str] = field(default_factory=default_key_match_order)
     use_music_api: bool = (
@@ -170,9 +175,16 @@ class Config:
     )
     convert_to_mp3: bool = os.getenv("CONVERT_TO_MP3", "false").lower() == "true"
     delay_sec: int = int(os.getenv("XIAOMUSIC_DELAY_SEC", 0))  # 下一首歌延迟播放秒数
+    prefetch_next_sec: int = int(
+        os.getenv("XIAOMUSIC_PREFETCH_NEXT_SEC", 15)
+    )  # 当前歌曲结束前多少秒预先准备下一首，0 表示不预取
     continue_play: bool = (
         os.getenv("XIAOMUSIC_CONTINUE_PLAY", "false").lower() == "true"
     )
+    # 按设备播放状态切歌，而不是只按歌曲时长定时
+    enable_status_advance: bool = (
+        os.getenv("XIAOMUSIC_ENABLE_STATUS_ADVANCE", "false").lower() == "true"
+    )
     # 目录监控配置
     enable_file_watch: bool = (
         os.getenv("XIAOMUSIC_ENABLE_FILE_WATCH", "false").lower() == "true"
@@ -181,6 +193,11 @@ class Config:
         os.getenv("XIAOMUSIC_FILE_WATCH_DEBOUNCE", 10)
     )  # 监控刷新延迟时间(秒)
     pull_ask_sec: int = int(os.getenv("XIAOMUSIC_PULL_ASK_SEC", "1"))
+    # 对话记录拉取模式: fixed 固定间隔; adaptive 按设备活跃程度调整间隔
+    pull_ask_mode: str = os.getenv("XIAOMUSIC_PULL_ASK_MODE", "fixed")
+    pull_ask_idle_max_sec: int = int(
+        os.getenv("XIAOMUSIC_PULL_ASK_IDLE_MAX_SEC", "10")
+    )  # adaptive 模式下空闲设备的最大拉取间隔(秒)
     enable_pull_ask: bool = (
         os.getenv("XIAOMUSIC_ENABLE_PULL_ASK", "false").lower() == "true"
     )
@@ -230,6 +247,13 @@ class Config:
         os.getenv("XIAOMUSIC_ENABLE_AUTO_CLEAN_TEMP", "true").lower() == "true"
     )
     qrcode_timeout: int = os.getenv("QRCODE_TIMEOUT", 120)
+    # 网络歌曲时长缓存有效天数
+    web_music_duration_cache_days: int = int(
+        os.getenv("XIAOMUSIC_WEB_MUSIC_DURATION_CACHE_DAYS", "7")
+    )
+    # 歌曲名称到小爱音频ID(audio_id)的缓存有效天数
+    audio_id_cache_days: int = int(os.getenv("XIAOMUSIC_AUDIO_ID_CACHE_DAYS", "30"))
+
     def append_keyword(self, keys, action):
         for key in keys.split(","):
             if key:
@@ -259,6 +283,8 @@ class Config:
 
         # 转换数据
         self._active_cmd_arr = self.active_cmd.split(",") if self.active_cmd else []
+        self._active_cmd_set = set(self._active_cmd_arr)
+        self._key_matcher = KeywordMatcher(self.key_match_order)
         self._exclude_dirs_set = set(self.exclude_dirs.split(","))
 
     def __post_init__(self) -> None:
@@ -330,6 +356,13 @@ class Config:
     def get_active_cmd_arr(self):
         return self._active_cmd_arr
 
+    def get_active_cmd_set(self):
+        return self._active_cmd_set
+
+    # 按 key_match_order 预先构建的关键词匹配器
+    def get_key_matcher(self):
+        return self._key_matcher
+
     def get_exclude_dirs_set(self):
         return self._exclude_dirs_set
 
@@ -343,6 +376,14 @@ class Config:
         filename = os.path.join(self.conf_path, "setting.json")
         return filename
 
+    # 设备播放状态文件，播放时频繁变化的设备字段单独保存在这里
+    def getdevicestatefile(self):
+        return os.path.join(os.path.dirname(self.getsettingfile()), "device_state.json")
+
+    # 自定义歌单和网络歌单数据库
+    def getplaylistdbfile(self):
+        return os.path.join(os.path.dirname(self.getsettingfile()), "playlists.db")
+
     @property
     def tag_cache_path(self):
         if (len(self.cache_dir) > 0) and (not os.path.exists(self.cache_dir)):
@@ -350,6 +391,20 @@ class Config:
         filename = os.path.join(self.cache_dir, "tag_cache.json")
         return filename
 
+    @property
+    def web_music_duration_cache_path(self):
+        if (len(self.cache_dir) > 0) and (not os.path.exists(self.cache_dir)):
+            os.makedirs(self.cache_dir)
+        filename = os.path.join(self.cache_dir, "web_music_duration_cache.json")
+        return filename
+
+    @property
+    def audio_id_cache_path(self):
+        if (len(self.cache_dir) > 0) and (not os.path.exists(self.cache_dir)):
+            os.makedirs(self.cache_dir)
+        filename = os.path.join(self.cache_dir, "audio_id_cache.json")
+        return filename
+
     @property
     def picture_cache_path(self):
         cache_path = os.path.join(self.cache_dir, "picture_cache")
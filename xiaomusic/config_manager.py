@@ -1,11 +1,22 @@
 """配置管理模块
 
 负责配置的加载、保存、更新和管理。
+
+配置修改后先标记为待保存，延迟 CONFIG_SAVE_DELAY_SEC 秒后合并写入。
+播放时频繁变化的设备字段（当前歌曲、歌单等）单独保存在 device_state.json，
+切歌只重写这个小文件，不重写整个 setting.json。
 """
 
+import asyncio
 import json
 from dataclasses import asdict
 
+from xiaomusic.const import CONFIG_SAVE_DELAY_SEC
+from xiaomusic.utils.file_utils import atomic_write_json
+
+# 单独保存到设备状态文件的设备字段
+DEVICE_STATE_FIELDS = ("play_type", "cur_music", "cur_playlist", "playlist2music")
+
 
 class ConfigManager:
     """配置管理类
@@ -26,18 +37,24 @@ class ConfigManager:
         """
         self.config = config
         self.log = log
+        # 待保存的修改
+        self._setting_dirty = False
+        self._device_state_dirty = False
+        self._devices = {}
+        self._save_handle = None
 
     def try_init_setting(self):
         """尝试从设置文件加载配置
 
-        从配置文件中读取设置并更新当前配置。
+        从配置文件中读取设置并更新当前配置，设备状态文件中的字段覆盖到设备配置上。
         如果文件不存在或格式错误，会记录日志但不会抛出异常。
         """
         try:
             filename = self.config.getsettingfile()
             with open(filename, encoding="utf-8") as f:
                 data = json.loads(f.read())
-                return data
+            self._merge_device_state(data)
+            return data
         except FileNotFoundError:
             self.log.info(f"The file {filename} does not exist.")
             return None
@@ -48,38 +65,109 @@ class ConfigManager:
             self.log.exception(f"Execption {e}")
             return None
 
+    def _merge_device_state(self, data):
+        """把设备状态文件中的字段合并到配置数据的设备配置中"""
+        filename = self.config.getdevicestatefile()
+        try:
+            with open(filename, encoding="utf-8") as f:
+                states = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.log.warning(f"读取设备状态文件 {filename} 失败: {e}")
+            return
+        devices = data.get("devices")
+        if not isinstance(devices, dict):
+            return
+        for did, state in states.items():
+            if did in devices and isinstance(state, dict):
+                devices[did].update(
+                    {k: v for k, v in state.items() if k in DEVICE_STATE_FIELDS}
+                )
+
     def do_saveconfig(self, data):
         """配置文件落地
 
-        将配置数据写入文件。
+        将配置数据原子地写入文件。
 
         Args:
             data: 要保存的配置数据（字典格式）
         """
         filename = self.config.getsettingfile()
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        atomic_write_json(filename, data, indent=2)
         self.log.info(f"Configuration saved to {filename}")
 
+    def do_save_device_state(self):
+        """设备状态文件落地"""
+        filename = self.config.getdevicestatefile()
+        states = {
+            did: {k: getattr(device, k) for k in DEVICE_STATE_FIELDS}
+            for did, device in self.config.devices.items()
+        }
+        atomic_write_json(filename, states)
+        self.log.debug(f"Device state saved to {filename}")
+
     def save_cur_config(self, devices):
         """把当前配置落地
 
-        将当前运行时的配置保存到文件。
-        会同步设备配置到 config 对象中。
+        标记整个配置待保存，延迟合并写入。
+        写入时会同步设备配置到 config 对象中。
+
+        Args:
+            devices: 设备字典 {did: XiaoMusicDevice}
+        """
+        self._devices = devices
+        self._setting_dirty = True
+        self._schedule_save()
+
+    def save_device_state(self, devices):
+        """把设备状态落地
+
+        只标记设备状态待保存，延迟合并写入设备状态文件。
 
         Args:
             devices: 设备字典 {did: XiaoMusicDevice}
         """
+        self._devices = devices
+        self._device_state_dirty = True
+        self._schedule_save()
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有事件循环时直接写入
+            self.flush()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(CONFIG_SAVE_DELAY_SEC, self.flush)
+
+    def flush(self):
+        """立即写入所有待保存的修改"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not (self._setting_dirty or self._device_state_dirty):
+            return
+
         # 同步设备配置
         for did in self.config.devices.keys():
-            deviceobj = devices.get(did)
+            deviceobj = self._devices.get(did)
             if deviceobj is not None:
                 self.config.devices[did] = deviceobj.device
 
-        # 转换为字典并保存
-        data = asdict(self.config)
-        self.do_saveconfig(data)
-        self.log.info("save_cur_config ok")
+        setting_dirty = self._setting_dirty
+        self._setting_dirty = False
+        self._device_state_dirty = False
+        try:
+            # 加载时设备状态文件会覆盖 setting.json 中的设备字段，两者每次都一起更新
+            self.do_save_device_state()
+            if setting_dirty:
+                # 转换为字典并保存
+                self.do_saveconfig(asdict(self.config))
+                self.log.info("save_cur_config ok")
+        except Exception as e:
+            self.log.exception(f"保存配置失败: {e}")
 
     def update_config(self, data):
         """更新配置
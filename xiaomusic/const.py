@@ -8,7 +8,7 @@ SUPPORT_MUSIC_TYPE = [
     ".wma",
 ]
 
-LATEST_ASK_API = "https://userprofile.mina.mi.com/device_profile/v2/conversation?source=dialogu&hardware={hardware}&timestamp={timestamp}&limit=2"
+LATEST_ASK_API = "https://userprofile.mina.mi.com/device_profile/v2/conversation?source=dialogu&hardware={hardware}&timestamp={timestamp}&limit=5"
 COOKIE_TEMPLATE = "deviceId={device_id}; serviceToken={service_token}; userId={user_id}"
 
 PLAY_TYPE_ONE = 0  # 单曲循环
@@ -17,6 +17,36 @@ PLAY_TYPE_RND = 2  # 随机播放
 PLAY_TYPE_SIN = 3  # 单曲播放
 PLAY_TYPE_SEQ = 4  # 顺序播放
 
+# 按设备状态切歌时的轮询参数(秒)
+STATUS_POLL_MIN_SEC = 1  # 接近结束时的轮询间隔
+STATUS_POLL_MAX_SEC = 30  # 歌曲中段的最大轮询间隔
+STATUS_POLL_NEAR_END_SEC = 10  # 剩余多少秒内开始密集轮询
+STATUS_ADVANCE_GRACE_SEC = 10  # 超过预计结束时间多久仍未结束则强制切歌
+
+# adaptive 模式下，设备有新对话后保持快速拉取的时长(秒)
+PULL_ASK_ACTIVE_SEC = 60
+# 单台设备一次拉取对话记录的超时时间(秒)，包含内部重试
+PULL_ASK_DEVICE_TIMEOUT_SEC = 50
+# 拉取连续失败时退避的最大间隔(秒)
+PULL_ASK_FAIL_MAX_SEC = 60
+
+# 事件总线待投递队列长度和配置变更事件的合并窗口(秒)
+EVENT_QUEUE_SIZE = 256
+EVENT_COALESCE_SEC = 1.0
+# 退出时等待事件投递完的最长时间(秒)，订阅者卡住时不阻塞退出
+EVENT_FLUSH_TIMEOUT_SEC = 5
+
+# 配置修改后延迟写入文件的时间(秒)，期间的多次修改合并为一次写入
+CONFIG_SAVE_DELAY_SEC = 3
+# 持久化缓存修改后延迟写入文件的时间(秒)，期间的多次修改合并为一次写入
+CACHE_SAVE_DELAY_SEC = 10
+
+# WebSocket 推送播放状态的心跳间隔(秒)，两次心跳之间进度由客户端推算
+PLAYBACK_HEARTBEAT_SEC = 10
+
+# 自动添加歌曲时每个歌单预先搜索好的候选歌曲数
+AUTO_ADD_SONG_LOOKAHEAD = 5
+
 # 需要采用 mina 获取对话记录的设备型号
 GET_ASK_BY_MINA = [
     "M01",
@@ -11,9 +11,19 @@ import asyncio
 import json
 import time
 
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import ClientTimeout
 
-from xiaomusic.const import GET_ASK_BY_MINA, LATEST_ASK_API
+from xiaomusic.const import (
+    GET_ASK_BY_MINA,
+    LATEST_ASK_API,
+    PULL_ASK_ACTIVE_SEC,
+    PULL_ASK_DEVICE_TIMEOUT_SEC,
+    PULL_ASK_FAIL_MAX_SEC,
+)
+from xiaomusic.utils.http_client import cookies_for_url, http_client
+
+# 小爱对话记录接口的单次请求超时
+LATEST_ASK_TIMEOUT = ClientTimeout(total=15)
 
 
 class ConversationPoller:
@@ -22,6 +32,11 @@ class ConversationPoller:
     负责定期从小爱音箱拉取最新的对话记录，支持两种方式：
     1. 通过小爱API直接获取（LATEST_ASK_API）
     2. 通过Mina服务获取（适用于特定硬件）
+
+    每台设备在独立的协程里轮询，新对话记录放入共享的 record_queue 由对话循环处理。
+    拉取节奏由 config.pull_ask_mode 决定：fixed 按 pull_ask_sec 固定间隔拉取所有设备；
+    adaptive 对刚有对话或正在播放的设备按 pull_ask_sec 快速拉取，空闲设备的间隔
+    逐次翻倍，最长 pull_ask_idle_max_sec。
     """
 
     def __init__(
@@ -30,6 +45,7 @@ class ConversationPoller:
         log,
         auth_manager,
         device_manager,
+        client=None,
     ):
         """初始化对话轮询器
 
@@ -38,120 +54,199 @@ class ConversationPoller:
             log: 日志对象
             auth_manager: 认证管理器实例
             device_manager: 设备管理器实例
+            client: 共享 HTTP 客户端，默认使用进程内共享的 http_client
         """
         self.config = config
         self.log = log
         self.auth_manager = auth_manager
         self.device_manager = device_manager
+        self.http_client = client or http_client
         self.last_timestamp = {}  # key为 did. timestamp last call mi speaker
-
-        # 存储最新的对话记录
-        self.last_record = None
-
-        # 内部事件管理
-        self.polling_event = asyncio.Event()
-        self.new_record_event = asyncio.Event()
+        # adaptive 模式下各设备的拉取状态，key 为 did
+        self._last_poll_time = {}  # 上次拉取时间
+        self._last_active_time = {}  # 上次有新对话的时间
+        self._idle_polls = {}  # 连续空闲拉取次数
+        # 时间戳等于 last_timestamp 的已处理记录 {did: set[(time, query)]}，
+        # last_timestamp 前进时清空
+        self._last_records = {}
+
+        # 各设备轮询协程放入的新对话记录
+        self.record_queue = asyncio.Queue()
+        # 各设备的轮询任务 {device_id: task}
+        self._poll_tasks = {}
+        # 各设备待处理的对话记录和处理任务，同一设备的命令按顺序依次处理 {did: ...}
+        self._device_queues = {}
+        self._device_workers = {}
 
     async def run_conversation_loop(self, do_check_cmd_callback, reset_timer_callback):
         """运行对话循环
 
         持续运行的主循环，负责：
         1. 启动对话轮询任务
-        2. 等待新对话记录
-        3. 调用回调处理对话命令
+        2. 从共享队列取出新对话记录，按设备分发
+        3. 每台设备一个处理协程，依次调用回调处理该设备的命令，不同设备之间并发
 
         Args:
             do_check_cmd_callback: 处理命令的回调函数 async def(did, query, ctrl_panel)
             reset_timer_callback: 重置计时器的回调函数 async def(answer_length, did)
         """
-        # 启动轮询任务
-        async with ClientSession() as session:
-            task = asyncio.create_task(self.poll_latest_ask(session))
-            assert task is not None  # to keep the reference to task, do not remove this
+        # 启动轮询任务，使用共享会话复用到小爱服务器的连接
+        session = self.http_client.get_session()
+        task = asyncio.create_task(self.poll_latest_ask(session))
+        assert task is not None  # to keep the reference to task, do not remove this
+
+        try:
+            while True:
+                new_record = await self.record_queue.get()
+                did = new_record.get("did", "").strip()
+                queue = self._device_queues.setdefault(did, asyncio.Queue())
+                queue.put_nowait(new_record)
+                worker = self._device_workers.get(did)
+                if worker is None or worker.done():
+                    self._device_workers[did] = asyncio.create_task(
+                        self._process_device_records(
+                            queue, do_check_cmd_callback, reset_timer_callback
+                        )
+                    )
+        except asyncio.CancelledError:
+            self.log.info("Conversation loop cancelled, cleaning up...")
+            tasks = [task, *self._device_workers.values()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._device_workers.clear()
+            raise
 
+    async def _process_device_records(
+        self, queue, do_check_cmd_callback, reset_timer_callback
+    ):
+        """依次处理一台设备的对话记录，单条命令出错不影响后续命令"""
+        while True:
+            new_record = await queue.get()
+            query = new_record.get("query", "").strip()
+            did = new_record.get("did", "").strip()
             try:
-                while True:
-                    self.polling_event.set()
-                    await self.new_record_event.wait()
-                    self.new_record_event.clear()
-                    new_record = self.last_record
-                    self.polling_event.clear()  # stop polling when processing the question
-
-                    query = new_record.get("query", "").strip()
-                    did = new_record.get("did", "").strip()
-                    await do_check_cmd_callback(did, query, False)
-
-                    answer = new_record.get("answer")
-                    answers = new_record.get("answers", [{}])
-                    if answers:
-                        answer = answers[0].get("tts", {}).get("text", "").strip()
-                        await reset_timer_callback(len(answer), did)
-                        self.log.debug(f"query:{query} did:{did} answer:{answer}")
-            except asyncio.CancelledError:
-                self.log.info("Conversation loop cancelled, cleaning up...")
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-                raise
+                await do_check_cmd_callback(did, query, False)
+
+                answer = new_record.get("answer")
+                answers = new_record.get("answers", [{}])
+                if answers:
+                    answer = answers[0].get("tts", {}).get("text", "").strip()
+                    await reset_timer_callback(len(answer), did)
+                    self.log.debug(f"query:{query} did:{did} answer:{answer}")
+            except Exception as e:
+                self.log.exception(f"处理对话命令失败 did:{did} query:{query} {e}")
 
     async def poll_latest_ask(self, session):
         """轮询最新对话记录
 
-        持续运行的协程，定期从所有设备拉取最新对话记录。
-        根据配置的拉取间隔和硬件类型选择合适的获取方式。
+        为每台设备启动独立的轮询协程，并随设备列表变化增减。
+        各设备有自己的超时和失败退避，一台设备请求慢不会拖慢其他设备。
 
         Args:
             session: aiohttp客户端会话
         """
         try:
             while True:
-                if not self.config.enable_pull_ask:
-                    self.log.debug("Listening new message disabled")
-                    await asyncio.sleep(5)
-                    continue
-
-                self.log.debug(
-                    f"Listening new message, timestamp: {self.last_timestamp}"
-                )
-                # 动态获取最新的 cookie_jar
-                if self.auth_manager.cookie_jar is not None:
-                    session._cookie_jar = self.auth_manager.cookie_jar
-
-                # 拉取所有音箱的对话记录
-                tasks = []
-                for device_id in self.device_manager.device_id_did:
-                    # 首次用当前时间初始化
-                    did = self.device_manager.get_did(device_id)
-                    if did not in self.last_timestamp:
-                        self.last_timestamp[did] = int(time.time() * 1000)
-
-                    hardware = self.device_manager.get_hardward(device_id)
-                    if (hardware in GET_ASK_BY_MINA) or self.config.get_ask_by_mina:
-                        tasks.append(self.get_latest_ask_by_mina(device_id))
-                    else:
-                        tasks.append(
-                            self.get_latest_ask_from_xiaoai(session, device_id)
+                device_ids = set(self.device_manager.device_id_did)
+                for device_id in list(self._poll_tasks):
+                    if device_id not in device_ids:
+                        self._poll_tasks.pop(device_id).cancel()
+                for device_id in device_ids:
+                    task = self._poll_tasks.get(device_id)
+                    if task is None or task.done():
+                        self._poll_tasks[device_id] = asyncio.create_task(
+                            self._poll_device(session, device_id)
                         )
-                await asyncio.gather(*tasks)
-
-                start = time.perf_counter()
-                await self.polling_event.wait()
-                if self.config.pull_ask_sec <= 1:
-                    if (d := time.perf_counter() - start) < 1:
-                        await asyncio.sleep(1 - d)
-                else:
-                    sleep_sec = 0
-                    while True:
-                        await asyncio.sleep(1)
-                        sleep_sec = sleep_sec + 1
-                        if sleep_sec >= self.config.pull_ask_sec:
-                            break
+                await asyncio.sleep(5)
         except asyncio.CancelledError:
             self.log.info("Polling task cancelled")
+            for task in self._poll_tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._poll_tasks.values(), return_exceptions=True)
+            self._poll_tasks.clear()
             raise
 
+    async def _poll_device(self, session, device_id):
+        """单台设备的轮询循环"""
+        did = self.device_manager.get_did(device_id)
+        failures = 0
+        while True:
+            if not self.config.enable_pull_ask:
+                self.log.debug("Listening new message disabled")
+                await asyncio.sleep(5)
+                continue
+
+            self.log.debug(
+                f"Listening new message did:{did}, timestamp: {self.last_timestamp.get(did)}"
+            )
+            ok = False
+            try:
+                ok = await asyncio.wait_for(
+                    self._fetch_latest_ask(session, device_id),
+                    PULL_ASK_DEVICE_TIMEOUT_SEC,
+                )
+            except asyncio.TimeoutError:
+                self.log.warning(f"拉取对话记录超时 did:{did}")
+            failures = 0 if ok else failures + 1
+
+            last_poll = time.time()
+            self._last_poll_time[did] = last_poll
+            if self._is_device_active(did, last_poll):
+                self._idle_polls[did] = 0
+            else:
+                self._idle_polls[did] = self._idle_polls.get(did, 0) + 1
+
+            await self._wait_next_poll(did, last_poll, failures)
+
+    def _poll_interval(self, did, now, failures=0):
+        """设备当前的拉取间隔（秒），连续失败时按失败次数退避"""
+        if self.config.pull_ask_mode == "adaptive":
+            interval = self._adaptive_interval(did, now)
+        else:
+            interval = max(self.config.pull_ask_sec, 1)
+        if failures:
+            backoff = max(self.config.pull_ask_sec, 1) * 2 ** min(failures, 16)
+            interval = max(interval, min(backoff, PULL_ASK_FAIL_MAX_SEC))
+        return interval
+
+    async def _wait_next_poll(self, did, last_poll, failures):
+        """等到下一次拉取时间，间隔每秒重新计算，设备开始播放或有新对话后会立即变短"""
+        while True:
+            remaining = last_poll + self._poll_interval(did, time.time(), failures)
+            remaining -= time.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 1))
+
+    def _fetch_latest_ask(self, session, device_id):
+        """按硬件类型选择获取方式，返回拉取一台设备对话记录的协程"""
+        # 首次用当前时间初始化
+        did = self.device_manager.get_did(device_id)
+        if did not in self.last_timestamp:
+            self.last_timestamp[did] = int(time.time() * 1000)
+
+        hardware = self.device_manager.get_hardward(device_id)
+        if (hardware in GET_ASK_BY_MINA) or self.config.get_ask_by_mina:
+            return self.get_latest_ask_by_mina(device_id)
+        return self.get_latest_ask_from_xiaoai(session, device_id)
+
+    def _is_device_active(self, did, now):
+        """设备是否处于活跃状态：正在播放，或最近有过对话"""
+        device = self.device_manager.devices.get(did)
+        if device is not None and device.is_playing:
+            return True
+        return now - self._last_active_time.get(did, 0) < PULL_ASK_ACTIVE_SEC
+
+    def _adaptive_interval(self, did, now):
+        """adaptive 模式下设备当前的拉取间隔（秒）"""
+        base = max(self.config.pull_ask_sec, 1)
+        if self._is_device_active(did, now):
+            return base
+        max_sec = max(self.config.pull_ask_idle_max_sec, base)
+        idle_polls = min(self._idle_polls.get(did, 0), 16)
+        return min(base * 2**idle_polls, max_sec)
+
     async def get_latest_ask_from_xiaoai(self, session, device_id):
         """从小爱API获取最新对话
 
@@ -163,24 +258,26 @@ class ConversationPoller:
             device_id: 设备ID
 
         Returns:
-            None - 通过 _check_last_query 更新内部状态
+            bool: 是否成功获取，对话记录通过 _check_last_query 放入队列
         """
-        cookies = {"deviceId": device_id}
         retries = 3
         for i in range(retries):
             try:
-                timeout = ClientTimeout(total=15)
                 hardware = self.device_manager.get_hardward(device_id)
                 url = LATEST_ASK_API.format(
                     hardware=hardware,
                     timestamp=str(int(time.time() * 1000)),
                 )
                 # self.log.debug(f"url:{url} device_id:{device_id} hardware:{hardware}")
-                r = await session.get(url, timeout=timeout, cookies=cookies)
+                # 共享会话不保存 cookie，每次带上最新的账号 cookie
+                cookies = cookies_for_url(self.auth_manager.cookie_jar, url)
+                cookies["deviceId"] = device_id
+                r = await session.get(url, timeout=LATEST_ASK_TIMEOUT, cookies=cookies)
 
                 # 检查响应状态码
                 if r.status != 200:
                     self.log.warning(f"Request failed with status {r.status}")
+                    r.release()
                     # fix #362
                     if i == 2 and r.status == 401:
                         await self.auth_manager.init_all_data()
@@ -188,7 +285,7 @@ class ConversationPoller:
 
             except asyncio.CancelledError:
                 self.log.warning("Task was cancelled.")
-                return None
+                raise
 
             except Exception as e:
                 self.log.warning(f"Execption {e}")
@@ -203,8 +300,10 @@ class ConversationPoller:
                     self.log.info("Maybe outof date trying to re init it")
                     await self.auth_manager.init_all_data()
             else:
-                return self._get_last_query(device_id, data)
+                self._get_last_query(device_id, data)
+                return True
         self.log.warning("get_latest_ask_from_xiaoai. All retries failed.")
+        return False
 
     async def get_latest_ask_by_mina(self, device_id):
         """通过Mina服务获取最新对话
@@ -215,7 +314,7 @@ class ConversationPoller:
             device_id: 设备ID
 
         Returns:
-            None - 通过 _check_last_query 更新内部状态
+            bool: 是否成功获取，对话记录通过 _check_last_query 放入队列
         """
         try:
             did = self.device_manager.get_did(device_id)
@@ -224,29 +323,33 @@ class ConversationPoller:
                 self.log.warning(
                     f"mina_service is None, skip get_latest_ask_by_mina for device {device_id}"
                 )
-                return
+                return False
             messages = await self.auth_manager.mina_service.get_latest_ask(device_id)
             self.log.debug(
                 f"get_latest_ask_by_mina device_id:{device_id} did:{did} messages:{messages}"
             )
+            records = []
             for message in messages:
                 query = message.response.answer[0].question
                 answer = message.response.answer[0].content
-                last_record = {
-                    "time": message.timestamp_ms,
-                    "did": did,
-                    "query": query,
-                    "answer": answer,
-                }
-                self._check_last_query(last_record)
+                records.append(
+                    {
+                        "time": message.timestamp_ms,
+                        "did": did,
+                        "query": query,
+                        "answer": answer,
+                    }
+                )
+            self._check_new_records(records)
         except Exception as e:
             self.log.warning(f"get_latest_ask_by_mina {e}")
-        return
+            return False
+        return True
 
     def _get_last_query(self, device_id, data):
-        """从API响应数据中提取最后一条对话
+        """从API响应数据中提取新的对话
 
-        解析小爱API返回的JSON数据，提取最新的对话记录。
+        解析小爱API返回的JSON数据，所有比上次更新的记录都会按时间顺序处理。
 
         Args:
             device_id: 设备ID
@@ -261,18 +364,40 @@ class ConversationPoller:
             records = json.loads(d).get("records")
             if not records:
                 return
-            last_record = records[0]
-            last_record["did"] = did
-            answers = last_record.get("answers", [{}])
-            if answers:
-                answer = answers[0].get("tts", {}).get("text", "").strip()
-                last_record["answer"] = answer
-            self._check_last_query(last_record)
+            for record in records:
+                record["did"] = did
+                answers = record.get("answers", [{}])
+                if answers:
+                    answer = answers[0].get("tts", {}).get("text", "").strip()
+                    record["answer"] = answer
+            self._check_new_records(records)
+
+    def _check_new_records(self, records):
+        """按时间从旧到新依次检查一页对话记录"""
+        for record in sorted(records, key=lambda r: r.get("time") or 0):
+            self._check_last_query(record)
+
+    def _is_duplicate_record(self, did, timestamp, query):
+        """是否已经处理过这条记录，没处理过则记下
+
+        调用前已保证 timestamp 不早于 last_timestamp。更早的记录都已处理过，
+        所以只需记住时间戳等于 last_timestamp 的记录，不会无限增长，也不需要过期。
+        """
+        key = (timestamp, query)
+        if timestamp > self.last_timestamp[did]:
+            self._last_records[did] = {key}
+            return False
+        seen = self._last_records.setdefault(did, set())
+        if key in seen:
+            return True
+        seen.add(key)
+        return False
 
     def _check_last_query(self, last_record):
         """检查并更新最后一条对话记录
 
-        验证对话记录的时间戳，如果是新记录则更新并触发事件。
+        验证对话记录的时间戳并去重，如果是新记录则放入 record_queue。
+        时间戳相同的不同记录也会处理。
 
         Args:
             last_record: 对话记录字典，包含 did、time、query、answer 等字段
@@ -282,7 +407,12 @@ class ConversationPoller:
         query = last_record.get("query", "").strip()
         self.log.debug(f"{did} 获取到最后一条对话记录：{query} {timestamp}")
 
-        if timestamp > self.last_timestamp[did]:
-            self.last_timestamp[did] = timestamp
-            self.last_record = last_record
-            self.new_record_event.set()
+        # 比上次处理的记录更早的不再处理，同一时间戳的按内容区分
+        if timestamp is None or timestamp < self.last_timestamp[did]:
+            return
+        if self._is_duplicate_record(did, timestamp, query):
+            return
+        self.last_timestamp[did] = timestamp
+        self._last_active_time[did] = time.time()
+        self._idle_polls[did] = 0
+        self.record_queue.put_nowait(last_record)
@@ -6,9 +6,13 @@
 - 设备信息查询
 """
 
+import time
 from typing import TYPE_CHECKING, Optional
 
 from xiaomusic.device_player import XiaoMusicDevice
+from xiaomusic.playback_state import make_etag
+from xiaomusic.timer_scheduler import TimerScheduler
+from xiaomusic.utils.network_utils import PersistentTTLCache
 from xiaomusic.utils.text_utils import parse_str_to_dict
 
 if TYPE_CHECKING:
@@ -37,6 +41,16 @@ class DeviceManager:
         self.devices: dict[str, XiaoMusicDevice] = {}
         self.device_id_did = {}  # device_id 到 did 的映射
         self.groups = {}  # 设备分组，key 为组名，value 为 device_id 列表
+        # 所有设备共用的定时器调度器，key 为 (did, 定时器名称)
+        self.timer_scheduler = TimerScheduler()
+        # 歌曲名称到 audio_id 的缓存，所有设备共用
+        self.audio_id_cache = PersistentTTLCache(
+            config.audio_id_cache_path,
+            ttl_sec=config.audio_id_cache_days * 24 * 3600,
+        )
+        # 组播放同步统计
+        self.command_latency = {}  # device_id -> 播放命令耗时的滑动平均(秒)
+        self.group_sync_stats = {}  # group_name -> 启动时间差统计
 
     def _update_devices(self):
         """更新设备列表
@@ -130,6 +144,69 @@ class DeviceManager:
                 devices[did] = self.devices[did]
         return devices
 
+    def record_command_latency(self, device_id, latency, alpha=0.3):
+        """记录设备播放命令耗时，按指数滑动平均更新
+
+        Args:
+            device_id: 设备ID
+            latency: 本次命令耗时(秒)
+            alpha: 新样本的权重
+        """
+        old = self.command_latency.get(device_id)
+        if old is None:
+            self.command_latency[device_id] = latency
+        else:
+            self.command_latency[device_id] = old + alpha * (latency - old)
+
+    def get_command_latency(self, device_id):
+        """获取设备播放命令耗时的滑动平均(秒)，没有记录返回 0"""
+        return self.command_latency.get(device_id, 0)
+
+    def record_group_skew(self, group_name, skew):
+        """记录一次组播放各设备预计开始时间的最大差值(秒)"""
+        stats = self.group_sync_stats.setdefault(
+            group_name,
+            {"count": 0, "last_skew": 0, "avg_skew": 0, "max_skew": 0},
+        )
+        stats["count"] += 1
+        stats["last_skew"] = skew
+        stats["avg_skew"] += (skew - stats["avg_skew"]) / stats["count"]
+        stats["max_skew"] = max(stats["max_skew"], skew)
+
+    def get_group_sync_stats(self):
+        """获取各分组的播放同步统计
+
+        Returns:
+            dict: {group_name: {count, last_skew, avg_skew, max_skew, latency}}，
+                latency 为组内各设备播放命令耗时的滑动平均
+        """
+        result = {}
+        for group_name, device_id_list in self.groups.items():
+            stats = dict(
+                self.group_sync_stats.get(
+                    group_name,
+                    {"count": 0, "last_skew": 0, "avg_skew": 0, "max_skew": 0},
+                )
+            )
+            stats["latency"] = {
+                device_id: self.get_command_latency(device_id)
+                for device_id in device_id_list
+            }
+            result[group_name] = stats
+        return result
+
+    def get_playback_states(self):
+        """获取所有设备的播放状态快照
+
+        Returns:
+            tuple: (etag, {did: 播放状态})，任一设备状态变化或设备增减时 etag 都会变化
+        """
+        states = [
+            self.devices[did].playback_state for did in sorted(self.devices.keys())
+        ]
+        now = time.time()
+        return make_etag(states), {state.did: state.to_dict(now) for state in states}
+
     async def update_device_info(self, auth_manager):
         """更新设备信息并刷新设备列表
 
@@ -4,10 +4,8 @@
 """
 
 import asyncio
-import copy
 import json
 import os
-import random
 import time
 from typing import TYPE_CHECKING
 
@@ -24,11 +22,19 @@ from xiaomusic.const import (
     PLAY_TYPE_RND,
     PLAY_TYPE_SEQ,
     PLAY_TYPE_SIN,
+    STATUS_ADVANCE_GRACE_SEC,
+    STATUS_POLL_MAX_SEC,
+    STATUS_POLL_MIN_SEC,
+    STATUS_POLL_NEAR_END_SEC,
     TTS_COMMAND,
 )
-from xiaomusic.events import DEVICE_CONFIG_CHANGED
+from xiaomusic.events import DEVICE_CONFIG_CHANGED, PLAYBACK_STATE_CHANGED
+from xiaomusic.play_queue import PlayQueue
+from xiaomusic.playback_state import PlaybackState
+from xiaomusic.tag_job_queue import PRIORITY_PLAYING, PRIORITY_PREFETCH
 from xiaomusic.utils.file_utils import chmodfile
-from xiaomusic.utils.text_utils import custom_sort_key, list2str
+from xiaomusic.utils.network_utils import get_stream_url
+from xiaomusic.utils.text_utils import list2str
 
 
 class XiaoMusicDevice:
@@ -62,26 +68,28 @@ class XiaoMusicDevice:
         self.event_bus = getattr(xiaomusic, "event_bus", None)
 
         self._download_proc = None  # 下载对象
-        self._next_timer = None
+        self._stream_download_task = None  # 边下边播的后台下载任务
+        self._background_tasks = set()  # 不需要等待结果的后台任务
+        # 预取的下一首
+        self._prefetched = None
+        # 按设备状态切歌时的轮询状态，取消或重设下一首定时器时置空
+        self._status_watch = None
         self.is_playing = False
         # 播放进度
         self._start_time = 0
         self._duration = 0
         self._paused_time = 0
         self._play_failed_cnt = 0
+        # 带版本号的播放状态快照，供批量查询接口使用
+        self.playback_state = PlaybackState(did=self.did)
+        # 最近一次播放各阶段耗时(秒)
+        self.play_timings = {}
 
         self._play_list = []
 
-        # 关机定时器
-        self._stop_timer = None
         self._last_cmd = None
         self.update_playlist()
 
-        # 添加歌曲定时器
-        self._add_song_timer = None
-        # TTS 播放定时器
-        self._tts_timer = None
-
     @property
     def did(self):
         """获取设备DID"""
@@ -92,6 +100,19 @@ class XiaoMusicDevice:
         """获取设备硬件型号"""
         return self.device.hardware
 
+    @property
+    def timer_scheduler(self):
+        """设备管理器统一管理的定时器调度器"""
+        return self.xiaomusic.device_manager.timer_scheduler
+
+    def _set_timer(self, name, delay, callback, *args):
+        """设置本设备的定时器，同名定时器会被重新计时"""
+        self.timer_scheduler.call_later((self.did, name), delay, callback, *args)
+
+    def _cancel_timer(self, name):
+        """取消本设备的定时器，返回是否存在"""
+        return self.timer_scheduler.cancel((self.did, name))
+
     def get_cur_music(self):
         """获取当前播放的音乐名称"""
         return self.device.cur_music
@@ -104,10 +125,24 @@ class XiaoMusicDevice:
         offset = time.time() - self._start_time - self._paused_time
         return offset, duration
 
-    # 自动搜歌并加入当前歌单
-    async def auto_add_song(self, cur_list_name, sleep_sec=20):
+    def _sync_playback_state(self):
+        """把当前播放状态同步到快照，有变化时版本号递增并发布事件"""
+        changed = self.playback_state.update(
+            is_playing=self.is_playing,
+            cur_music=self.get_cur_music(),
+            cur_playlist=self.device.cur_playlist,
+            play_type=self.device.play_type,
+            start_time=self._start_time,
+            paused_time=self._paused_time,
+            duration=self._duration,
+        )
+        if changed and self.event_bus:
+            self.event_bus.publish(PLAYBACK_STATE_CHANGED, did=self.did)
+
+    def _need_auto_add_song(self, cur_list_name):
+        """当前歌单是否需要自动添加歌曲"""
         if self.xiaomusic.js_plugin_manager is None:
-            return
+            return False
         # 是否启用自动添加
         auto_add_song = self.xiaomusic.js_plugin_manager.get_auto_add_song()
         is_online = self.xiaomusic.music_library.is_online_music(cur_list_name)
@@ -115,47 +150,42 @@ class XiaoMusicDevice:
         play_all = self.device.play_type == PLAY_TYPE_ALL
         # 当前播放的歌曲是歌单中的最后一曲
         is_last_song = False
-        cur_playlist = self._play_list
         cur_music = self.get_cur_music()
-        play_list_len = len(cur_playlist)
-        if play_list_len != 0:
+        if cur_music in self._play_list:
             index = self._play_list.index(cur_music)
-            is_last_song = index == play_list_len - 1
+            is_last_song = index == len(self._play_list) - 1
         # 四个条件都满足，才自动添加下一首
-        if auto_add_song and is_online and play_all and is_last_song:
-            await self._add_singer_song(cur_list_name, cur_music, sleep_sec)
+        return auto_add_song and is_online and play_all and is_last_song
 
-    # 启用延时器，搜索当前歌曲歌手的其他不在歌单内的歌曲
-    async def _add_singer_song(self, list_name, cur_music, sleep_sec):
-        # 取消之前的定时器（如果存在）
-        # self.cancel_add_song_timer()
+    # 自动搜歌并加入当前歌单
+    def auto_add_song(self, cur_list_name):
+        """播放歌单最后一首时，在后台预先搜索当前歌手的其他歌曲"""
+        if not self._need_auto_add_song(cur_list_name):
+            return
         # 以 '-' 分割，获取歌手名称
-        singer_name = cur_music.split("-")[1]
-        # 创建新的定时器，20秒后执行
-        self._add_song_timer = asyncio.create_task(
-            self._delayed_add_singer_song(list_name, singer_name, sleep_sec)
+        parts = self.get_cur_music().split("-")
+        if len(parts) < 2:
+            return
+        self.xiaomusic.online_music_service.prefill_singer_songs(
+            cur_list_name, parts[1]
         )
 
-    async def _delayed_add_singer_song(self, list_name, singer_name, sleep_sec):
-        """延迟执行添加歌手歌曲的操作"""
-        try:
-            await asyncio.sleep(sleep_sec)
-            await self.xiaomusic.add_singer_song(list_name, singer_name)
-        except asyncio.CancelledError:
-            return
-        finally:
-            # 执行完毕后清除定时器引用
-            if self._add_song_timer:  # 确保是当前任务
-                self._add_song_timer = None
-
-    def cancel_add_song_timer(self):
-        """取消添加歌曲的定时器"""
-        self.log.info("添加歌手歌曲的定时器已被取消")
-        if self._add_song_timer:
-            self._add_song_timer.cancel()
-            self._add_song_timer = None
-            return True
-        return False
+    def _has_auto_add_song(self):
+        """切歌时是否会从候选队列取歌，只查询不修改"""
+        list_name = self.device.cur_playlist
+        if not self._need_auto_add_song(list_name):
+            return False
+        return self.xiaomusic.online_music_service.has_auto_add_song(list_name)
+
+    def _take_auto_add_song(self):
+        """切歌时从候选队列取一首歌接在歌单末尾，没有候选歌曲时返回空字符串"""
+        list_name = self.device.cur_playlist
+        if not self._need_auto_add_song(list_name):
+            return ""
+        name = self.xiaomusic.online_music_service.take_auto_add_song(list_name)
+        if name and name not in self._play_list:
+            self._play_list.append(name)
+        return name
 
     async def play_music(self, name):
         """播放音乐（外部接口）"""
@@ -168,18 +198,21 @@ class XiaoMusicDevice:
             self.device.cur_playlist = "全部"
 
         list_name = self.device.cur_playlist
-        self._play_list = copy.copy(self.xiaomusic.music_library.music_list[list_name])
+        sorted_list = self.xiaomusic.music_library.get_sorted_music_list(list_name)
+        # 随机播放只换一个种子，不复制和打乱整个歌单
+        self._play_list = PlayQueue(
+            sorted_list, shuffle=self.device.play_type == PLAY_TYPE_RND
+        )
 
-        if self.device.play_type == PLAY_TYPE_RND:
-            random.shuffle(self._play_list)
+        if self._play_list.shuffled:
             self.log.info(
                 f"随机打乱 {list_name} {list2str(self._play_list, self.config.verbose)}"
             )
         else:
-            self._play_list.sort(key=custom_sort_key)
             self.log.info(
                 f"没打乱 {list_name} {list2str(self._play_list, self.config.verbose)}"
             )
+        self._sync_playback_state()
 
     async def play(self, name="", search_key=""):
         """播放歌曲（外部接口）"""
@@ -213,12 +246,74 @@ class XiaoMusicDevice:
             await self.do_tts(f"本地不存在歌曲{name}")
             return False
 
+        # 边下边播：拿到音频流就先播放，下载放到后台
+        if self.config.enable_stream_download and await self._start_stream_download(
+            name, search_key
+        ):
+            return True
+
         # 下载歌曲
         await self.download(search_key, name)
         # 把文件插入到播放列表里
         await self.add_download_music(name)
         return True
 
+    async def _start_stream_download(self, name, search_key):
+        """获取源站音频流先用于播放，同时在后台下载歌曲
+
+        Args:
+            name: 歌曲名称
+            search_key: 搜索关键词
+
+        Returns:
+            bool: 是否获取到音频流，获取失败时调用方改为下载完再播放
+        """
+        url, duration = await get_stream_url(self.config, search_key)
+        if not url:
+            self.log.info(f"获取音频流失败，下载完成后再播放 {search_key}")
+            return False
+
+        self.xiaomusic.music_library.set_stream_music(name, url, duration)
+        if name not in self._play_list:
+            self._play_list.append(name)
+        self._stream_download_task = asyncio.create_task(
+            self._download_in_background(search_key, name)
+        )
+        self.log.info(f"边下边播 {name} duration:{duration} stream_url:{url}")
+        return True
+
+    async def _download_in_background(self, search_key, name):
+        """后台下载歌曲，完成后把歌曲切换到本地文件"""
+        music_library = self.xiaomusic.music_library
+        try:
+            await self.download(search_key, name, tts=False)
+        except Exception as e:
+            self.log.exception(f"后台下载歌曲 {name} 失败: {e}")
+
+        file_path = os.path.join(self.config.download_path, f"{name}.mp3")
+        if not os.path.exists(file_path):
+            self.log.warning(f"后台下载歌曲 {name} 失败，文件不存在: {file_path}")
+            music_library.remove_stream_music(name)
+            return
+
+        await self.add_download_music(name)
+        music_library.remove_stream_music(name)
+        # 预取结果里的音频流地址可能过期，下次重新准备
+        if self._prefetched and self._prefetched["name"] == name:
+            self._prefetched = None
+        self.log.info(f"后台下载完成，{name} 已切换到本地文件 {file_path}")
+
+        # 音频流拿不到时长时没有设置下一首定时器，用本地文件的时长补上
+        if self.is_playing and self.get_cur_music() == name and self._duration <= 0.1:
+            sec = await music_library.get_music_duration(name)
+            if sec > 0.1:
+                self._duration = sec
+                self._sync_playback_state()
+                remaining = (
+                    sec + self.config.delay_sec - (time.time() - self._start_time)
+                )
+                await self.set_next_music_timeout(max(remaining, 0.1))
+
     async def _play_internal(self, name="", search_key="", allow_download=True):
         """播放歌曲的内部统一实现
 
@@ -285,6 +380,15 @@ class XiaoMusicDevice:
     async def _play_next(self):
         """播放下一首（内部实现）"""
         self.log.info("开始播放下一首")
+        # 自动添加的歌曲在真正切歌时才加入歌单
+        name = self._take_auto_add_song() or self._get_play_next_name()
+        if name == "":
+            self.log.info("本地没有歌曲")
+            return
+        await self._play(name)
+
+    def _get_play_next_name(self):
+        """按播放类型计算下一首要播放的歌曲名称，不修改播放列表"""
         name = self.get_cur_music()
         if (
             self.device.play_type == PLAY_TYPE_ALL
@@ -298,10 +402,7 @@ class XiaoMusicDevice:
             name = self.get_next_music()
             self.log.info(f"get_next_music {name}")
         self.log.info(f"_play_next. name:{name}, cur_music:{self.get_cur_music()}")
-        if name == "":
-            self.log.info("本地没有歌曲")
-            return
-        await self._play(name)
+        return name
 
     async def play_prev(self):
         """播放上一首（外部接口）"""
@@ -330,70 +431,132 @@ class XiaoMusicDevice:
         self._last_cmd = "playlocal"
         return await self._play_internal(name=name, search_key="", allow_download=False)
 
-    async def _playmusic(self, name):
-        """播放音乐的核心实现"""
+    async def _playmusic(self, name, prefetched=None):
+        """播放音乐的核心实现
+
+        获取播放地址、获取时长、强制停止三者互不依赖，并发执行；
+        播放只等待地址和停止完成，时长在播放开始后再取结果。
+
+        Args:
+            name: 歌曲名称
+            prefetched: 预取的下一首信息，有则直接使用其播放地址和时长，
+                并且上一首已自然播完，不再强制停止
+        """
+        timings = {}
+        play_start = time.perf_counter()
+        music_library = self.xiaomusic.music_library
+
         # 取消组内所有的下一首歌曲的定时器
-        await self.cancel_group_next_timer()
+        await self._timed_stage(timings, "cancel_timer", self.cancel_group_next_timer())
 
         self.is_playing = True
         self.device.cur_music = name
         self.device.playlist2music[self.device.cur_playlist] = name
         cur_playlist = self.device.cur_playlist
         self.log.info(f"cur_music {self.get_cur_music()}")
-        url, _ = await self.xiaomusic.music_library.get_music_url(name)
-        await self.group_force_stop_xiaoai()
-        self.log.info(f"播放 {url}")
-
-        results = await self.group_player_play(url, name)
-        if all(ele is None for ele in results):
-            self.log.info(f"播放 {name} 失败. 失败次数: {self._play_failed_cnt}")
-            await asyncio.sleep(1)
-            if (
-                self.is_playing
-                and self._last_cmd != "stop"
-                and self._play_failed_cnt < 10
-            ):
-                self._play_failed_cnt = self._play_failed_cnt + 1
-                await self._play_next()
-            return
-        # 重置播放失败次数
-        self._play_failed_cnt = 0
+        self._sync_playback_state()
+        duration_task = None
+        try:
+            if prefetched:
+                url = prefetched["url"]
+            else:
+                duration_task = asyncio.create_task(
+                    self._timed_stage(
+                        timings, "duration", music_library.get_music_duration(name)
+                    )
+                )
+                (url, _), _ = await asyncio.gather(
+                    self._timed_stage(
+                        timings, "url", music_library.get_music_url(name)
+                    ),
+                    self._timed_stage(
+                        timings, "force_stop", self.group_force_stop_xiaoai()
+                    ),
+                )
+            self.log.info(f"播放 {url}")
 
-        self.log.info(f"【{name}】已经开始播放了")
+            results = await self._timed_stage(
+                timings, "play", self.group_player_play(url, name)
+            )
+            if all(ele is None for ele in results):
+                self.log.info(f"播放 {name} 失败. 失败次数: {self._play_failed_cnt}")
+                await asyncio.sleep(1)
+                if (
+                    self.is_playing
+                    and self._last_cmd != "stop"
+                    and self._play_failed_cnt < 10
+                ):
+                    self._play_failed_cnt = self._play_failed_cnt + 1
+                    await self._play_next()
+                return
+            # 重置播放失败次数
+            self._play_failed_cnt = 0
 
-        # 记录歌曲开始播放的时间
-        self._start_time = time.time()
-        self._paused_time = 0
+            self.log.info(f"【{name}】已经开始播放了")
 
-        sec = await self.xiaomusic.music_library.get_music_duration(name)
-        # 存储真实歌曲时长
-        self._duration = sec
-        await self.xiaomusic.analytics.send_play_event(name, sec, self.hardware)
+            # 记录歌曲开始播放的时间
+            self._start_time = time.time()
+            self._paused_time = 0
 
-        # 设置下一首歌曲的播放定时器
-        if sec <= 0.1:
-            self.log.info(f"【{name}】不会设置下一首歌的定时器")
-            return
+            if prefetched and prefetched["duration"] > 0:
+                sec = prefetched["duration"]
+            elif duration_task:
+                sec = await duration_task
+            else:
+                sec = await self._timed_stage(
+                    timings, "duration", music_library.get_music_duration(name)
+                )
+            # 存储真实歌曲时长
+            self._duration = sec
+            self._sync_playback_state()
+            timings["total"] = time.perf_counter() - play_start
+            self.play_timings = timings
+            self.log.info(
+                f"播放阶段耗时 did: {self.did} name: {name} prefetched: {bool(prefetched)} "
+                + " ".join(f"{k}:{v:.3f}" for k, v in timings.items())
+            )
+            # 统计事件不阻塞播放流程，保留任务引用避免被回收
+            task = asyncio.create_task(
+                self.xiaomusic.analytics.send_play_event(name, sec, self.hardware)
+            )
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
 
-        # 计算自动添加歌曲的延迟时间，为当前歌曲时长的一半，但不超过60秒
-        if sec > 30:
-            sleep_sec = min(sec / 2, 60)
-            await self.auto_add_song(cur_playlist, sleep_sec)
-
-        # 计算获取时长的执行耗时
-        duration_execution_time = time.time() - self._start_time
-        self.log.info(f"获取音乐时长耗时: {duration_execution_time:.3f} 秒")
-        # 调整定时器时长，减去获取音乐时长的执行时间
-        adjusted_sec = sec + self.config.delay_sec - duration_execution_time
-        # 确保调整后的时长不会过小，最小保留0.1秒
-        adjusted_sec = max(adjusted_sec, 0.1)
-        self.log.info(
-            f"原始歌曲时长: {sec:.3f} 秒, 调整后定时器时长: {adjusted_sec:.3f} 秒"
-        )
-        await self.set_next_music_timeout(adjusted_sec)
-        # 发布设备配置变更事件
-        if self.event_bus:
-            self.event_bus.publish(DEVICE_CONFIG_CHANGED)
+            # 设置下一首歌曲的播放定时器
+            if sec <= 0.1:
+                self.log.info(f"【{name}】不会设置下一首歌的定时器")
+                return
+
+            # 歌单快播完时在后台准备自动添加的歌曲
+            self.auto_add_song(cur_playlist)
+
+            # 计算播放开始后等待时长的耗时
+            duration_execution_time = time.time() - self._start_time
+            self.log.info(f"获取音乐时长耗时: {duration_execution_time:.3f} 秒")
+            # 调整定时器时长，减去获取音乐时长的执行时间
+            adjusted_sec = sec + self.config.delay_sec - duration_execution_time
+            # 确保调整后的时长不会过小，最小保留0.1秒
+            adjusted_sec = max(adjusted_sec, 0.1)
+            self.log.info(
+                f"原始歌曲时长: {sec:.3f} 秒, 调整后定时器时长: {adjusted_sec:.3f} 秒"
+            )
+            await self.set_next_music_timeout(adjusted_sec)
+            # 发布设备配置变更事件
+            if self.event_bus:
+                self.event_bus.publish(DEVICE_CONFIG_CHANGED)
+        finally:
+            # 获取地址或停止出错时，不再等待时长
+            if duration_task and not duration_task.done():
+                duration_task.cancel()
+
+    @staticmethod
+    async def _timed_stage(timings, stage, coro):
+        """执行播放流程的一个阶段，并把耗时(秒)记录到 timings[stage]"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            timings[stage] = time.perf_counter() - start
 
     async def do_tts(self, value):
         """执行TTS（文字转语音）"""
@@ -411,40 +574,6 @@ class XiaoMusicDevice:
         self.log.info(f"do_tts ok. cur_music:{self.get_cur_music()}")
         await self.check_replay()
 
-    async def force_stop_xiaoai(self, device_id):
-        """强制停止小爱播放"""
-        try:
-            ret = await self.auth_manager.mina_service.player_pause(device_id)
-            self.log.info(
-                f"force_stop_xiaoai player_pause device_id:{device_id} ret:{ret}"
-            )
-            await self.stop_if_xiaoai_is_playing(device_id)
-        except Exception as e:
-            self.log.warning(f"Execption {e}")
-
-    async def get_if_xiaoai_is_playing(self):
-        """检查小爱是否正在播放"""
-        playing_info = await self.auth_manager.mina_service.player_get_status(
-            self.device_id
-        )
-        self.log.info(playing_info)
-        # WTF xiaomi api
-        is_playing = (
-            json.loads(playing_info.get("data", {}).get("info", "{}")).get("status", -1)
-            == 1
-        )
-        return is_playing
-
-    async def stop_if_xiaoai_is_playing(self, device_id):
-        """如果小爱正在播放则停止"""
-        is_playing = await self.get_if_xiaoai_is_playing()
-        if is_playing or self.config.enable_force_stop:
-            # stop it
-            ret = await self.auth_manager.mina_service.player_stop(device_id)
-            self.log.info(
-                f"stop_if_xiaoai_is_playing player_stop device_id:{device_id} enable_force_stop:{self.config.enable_force_stop} ret:{ret}"
-            )
-
     def isdownloading(self):
         """检查是否正在下载"""
         if not self._download_proc:
@@ -459,8 +588,14 @@ class XiaoMusicDevice:
         self.log.info("Download Process is still running.")
         return True
 
-    async def download(self, search_key, name):
-        """下载歌曲"""
+    async def download(self, search_key, name, tts=True):
+        """下载歌曲
+
+        Args:
+            search_key: 搜索关键词
+            name: 歌曲名称
+            tts: 是否播报正在下载，边下边播时不播报以免打断播放
+        """
         if self._download_proc:
             try:
                 self._download_proc.kill()
@@ -496,7 +631,8 @@ class XiaoMusicDevice:
         cmd = " ".join(sbp_args)
         self.log.info(f"download cmd: {cmd}")
         self._download_proc = await asyncio.create_subprocess_exec(*sbp_args)
-        await self.do_tts(f"正在下载歌曲{search_key}")
+        if tts:
+            await self.do_tts(f"正在下载歌曲{search_key}")
         self.log.info(f"正在下载中 {search_key} {name}")
         await self._download_proc.wait()
         # 下载完成后，修改文件权限
@@ -505,7 +641,11 @@ class XiaoMusicDevice:
 
     async def check_replay(self):
         """检查是否需要继续播放被打断的歌曲"""
-        if self.is_playing and not self.isdownloading():
+        # 边下边播时下载不影响播放，照常继续
+        stream_downloading = (
+            self._stream_download_task and not self._stream_download_task.done()
+        )
+        if self.is_playing and (stream_downloading or not self.isdownloading()):
             if not self.config.continue_play:
                 # 重新播放歌曲
                 self.log.info("现在重新播放歌曲")
@@ -524,7 +664,9 @@ class XiaoMusicDevice:
         filepath = os.path.join(self.config.download_path, f"{name}.mp3")
         self.xiaomusic.music_library.all_music[name] = filepath
         # 应该很快，阻塞运行
-        await self.xiaomusic.music_library._gen_all_music_tag({name: filepath})
+        await self.xiaomusic.music_library._gen_all_music_tag(
+            {name: filepath}, priority=PRIORITY_PLAYING
+        )
         if name not in self._play_list:
             self._play_list.append(name)
             self.log.info(f"add_download_music add_music {name}")
@@ -542,33 +684,35 @@ class XiaoMusicDevice:
         except ValueError:
             pass
 
-        if play_list_len == 1:
-            new_index = index  # 当只有一首歌曲时保持当前索引不变
+        if direction == "next":
+            step = 1
+        elif direction == "prev":
+            step = -1
         else:
-            if direction == "next":
-                new_index = index + 1
+            self.log.error("无效的方向参数")
+            return ""
+
+        # 跳过已经不存在的歌曲，最多把列表走一遍
+        new_index = index
+        for _ in range(play_list_len):
+            # 当只有一首歌曲时保持当前索引不变
+            if play_list_len > 1:
+                new_index += step
                 if (
                     self.device.play_type == PLAY_TYPE_SEQ
                     and new_index >= play_list_len
                 ):
                     self.log.info("顺序播放结束")
                     return ""
-                if new_index >= play_list_len:
-                    new_index = 0
-            elif direction == "prev":
-                new_index = index - 1
-                if new_index < 0:
-                    new_index = play_list_len - 1
-            else:
-                self.log.error("无效的方向参数")
-                return ""
-
-        name = self._play_list[new_index]
-        if not self.xiaomusic.music_library.is_music_exist(name):
-            self._play_list.pop(new_index)
-            self.log.info(f"pop not exist music: {name}")
-            return self.get_music(direction)
-        return name
+                new_index %= play_list_len
+
+            name = self._play_list[new_index]
+            if self.xiaomusic.music_library.is_music_exist(name):
+                return name
+            self.log.info(f"skip not exist music: {name}")
+
+        self.log.warning("当前播放列表没有可播放的歌曲")
+        return ""
 
     def get_next_music(self):
         """获取下一首音乐"""
@@ -630,9 +774,7 @@ class XiaoMusicDevice:
         self.log.info(f"_text_to_speech_edge_tts {value}")
         try:
             # 取消之前的 TTS 定时器
-            if self._tts_timer:
-                self._tts_timer.cancel()
-                self._tts_timer = None
+            if self._cancel_timer("tts"):
                 self.log.info("已取消之前的 TTS 定时器")
 
             # 使用 edge-tts 生成 MP3 文件
@@ -659,51 +801,77 @@ class XiaoMusicDevice:
 
             # 创建定时器，时长到后停止
             if duration > 0:
-
-                async def _tts_timeout():
-                    await asyncio.sleep(duration)
-                    try:
-                        self.log.info("TTS 播放定时器时间到")
-                        current_timer = self._tts_timer
-                        if current_timer:
-                            # 取消任务（防止任务被重复触发，即使sleep已结束）
-                            current_timer.cancel()
-                            try:
-                                await current_timer  # 等待任务取消完成，避免警告
-                            except asyncio.CancelledError:
-                                pass
-                            # 再置空引用
-                            self._tts_timer = None
-                            await self.stop(arg1="notts")
-                    except Exception as e:
-                        self.log.error(f"TTS 定时器异常: {e}")
-
-                self._tts_timer = asyncio.create_task(_tts_timeout())
+                self._set_timer("tts", duration, self._on_tts_timer)
                 self.log.info(f"已设置 TTS 定时器，{duration} 秒后停止")
 
         except Exception as e:
             self.log.exception(f"edge-tts 播放失败: {e}")
 
+    async def _on_tts_timer(self):
+        """TTS 播放定时器到点后停止"""
+        self.log.info("TTS 播放定时器时间到")
+        await self.stop(arg1="notts")
+
     async def group_player_play(self, url, name=""):
-        """同一组设备播放"""
-        device_id_list = self.xiaomusic.device_manager.get_group_device_id_list(
-            self.group_name
-        )
-        tasks = [
-            self.play_one_url(device_id, url, name) for device_id in device_id_list
-        ]
-        results = await asyncio.gather(*tasks)
+        """同一组设备播放
+
+        按各设备播放命令耗时的滑动平均错开发送时间：
+        耗时最长的设备最先发送，其余设备延后发送，使各设备实际开始播放的时间对齐。
+        audio_id 在发送前只查询一次，查询耗时不计入播放命令耗时。
+        """
+        device_manager = self.xiaomusic.device_manager
+        device_id_list = device_manager.get_group_device_id_list(self.group_name)
+
+        try:
+            audio_id = await self._get_audio_id(name)
+        except Exception as e:
+            self.log.exception(f"获取 audio_id 失败，不带 audio_id 播放: {e}")
+            audio_id = None
+
+        latency = {
+            device_id: device_manager.get_command_latency(device_id)
+            for device_id in device_id_list
+        }
+        max_latency = max(latency.values(), default=0)
+
+        async def _send(device_id):
+            delay = max_latency - latency[device_id]
+            if delay > 0:
+                await asyncio.sleep(delay)
+            start = time.perf_counter()
+            ret = await self.play_one_url(device_id, url, audio_id)
+            end = time.perf_counter()
+            if ret is not None:
+                device_manager.record_command_latency(device_id, end - start)
+            return ret, end
+
+        sent = await asyncio.gather(*[_send(device_id) for device_id in device_id_list])
+        results = [ret for ret, _ in sent]
+
+        # 以命令返回时间作为各设备开始播放的估计，统计组内时间差
+        started = [end for ret, end in sent if ret is not None]
+        if len(started) > 1:
+            skew = max(started) - min(started)
+            device_manager.record_group_skew(self.group_name, skew)
+            self.log.info(f"group_player_play {self.group_name} skew: {skew:.3f} 秒")
         self.log.info(f"group_player_play {url} {device_id_list} {results}")
         return results
 
-    async def play_one_url(self, device_id, url, name):
-        """在单个设备上播放URL"""
+    async def play_one_url(self, device_id, url, audio_id=None):
+        """在单个设备上播放URL
+
+        Args:
+            device_id: 设备ID
+            url: 播放地址
+            audio_id: 音频ID，为空时使用 miservice 的默认值
+        """
         ret = None
+        # 没有 audio_id 时不传，使用 miservice 的默认值
+        kwargs = {"audio_id": audio_id} if audio_id else {}
         try:
-            audio_id = await self._get_audio_id(name)
             if self.config.continue_play:
                 ret = await self.auth_manager.mina_service.play_by_music_url(
-                    device_id, url, _type=1, audio_id=audio_id
+                    device_id, url, _type=1, **kwargs
                 )
                 self.log.info(
                     f"play_one_url continue_play device_id:{device_id} ret:{ret} url:{url} audio_id:{audio_id}"
@@ -712,7 +880,7 @@ class XiaoMusicDevice:
                 self.hardware in NEED_USE_PLAY_MUSIC_API
             ):
                 ret = await self.auth_manager.mina_service.play_by_music_url(
-                    device_id, url, audio_id=audio_id
+                    device_id, url, **kwargs
                 )
                 self.log.info(
                     f"play_one_url play_by_music_url device_id:{device_id} ret:{ret} url:{url} audio_id:{audio_id}"
@@ -727,10 +895,18 @@ class XiaoMusicDevice:
         return ret
 
     async def _get_audio_id(self, name):
-        """获取音频ID"""
+        """获取音频ID
+
+        搜索结果按歌曲名称缓存在设备管理器中，所有设备共用，并持久化到 cache 目录
+        """
         audio_id = self.config.use_music_audio_id or "1582971365183456177"
         if not (self.config.use_music_api or self.config.continue_play):
             return str(audio_id)
+        audio_id_cache = self.xiaomusic.device_manager.audio_id_cache
+        cached = audio_id_cache.get(name)
+        if cached:
+            self.log.debug(f"_get_audio_id from cache. name: {name} songId:{cached}")
+            return cached
         try:
             params = {
                 "query": name,
@@ -742,13 +918,18 @@ class XiaoMusicDevice:
             response = await self.auth_manager.mina_service.mina_request(
                 "/music/search", params
             )
-            for song in response["data"]["songList"]:
+            song_list = response["data"]["songList"]
+            found = None
+            for song in song_list:
                 if song["originName"] == "QQ音乐":
-                    audio_id = song["audioID"]
+                    found = song["audioID"]
                     break
             # 没找到QQ音乐的歌曲，取第一个
-            if audio_id == 1582971365183456177:
-                audio_id = response["data"]["songList"][0]["audioID"]
+            if found is None and song_list:
+                found = song_list[0]["audioID"]
+            if found is not None:
+                audio_id = str(found)
+                audio_id_cache.set(name, audio_id)
             self.log.debug(f"_get_audio_id. name: {name} songId:{audio_id}")
         except Exception as e:
             self.log.error(f"_get_audio_id {e}")
@@ -761,6 +942,8 @@ class XiaoMusicDevice:
         pause_time = answer_length / 5 + 1
         offset, duration = self.get_offset_duration()
         self._paused_time += pause_time
+        # 暂停时长变了，客户端推算的播放进度也要跟着更新
+        self._sync_playback_state()
         new_time = duration - offset + pause_time
         await self.set_next_music_timeout(new_time)
         self.log.info(
@@ -768,37 +951,212 @@ class XiaoMusicDevice:
         )
 
     async def set_next_music_timeout(self, sec):
-        """设置下一首歌曲的播放定时器"""
+        """设置下一首歌曲的播放定时器
+
+        开启 enable_status_advance 时，改为轮询设备播放状态，在歌曲真正播完时切歌
+        """
         await self.cancel_next_timer()
 
-        async def _do_next():
-            await asyncio.sleep(sec)
-            try:
-                self.log.info(f"定时器时间到了 did: {self.did}")
-                current_timer = self._next_timer
-                if current_timer:
-                    # 取消任务（防止任务被重复触发，即使sleep已结束）
-                    current_timer.cancel()
-                    try:
-                        await current_timer  # 等待任务取消完成，避免警告
-                    except asyncio.CancelledError:
-                        pass
-                    # 再置空引用
-                    self._next_timer = None
-                    if self.device.play_type == PLAY_TYPE_SIN:
-                        self.log.info(f"单曲播放不继续播放下一首 did: {self.did}")
-                        await self.stop(arg1="notts")
-                    else:
-                        await self._play_next()
-                else:
-                    self.log.info(f"定时器时间到了但是不见了 did: {self.did}")
-                    await self.stop(arg1="notts")
+        if self.config.enable_status_advance:
+            self._status_watch = {
+                "deadline": time.time() + sec + STATUS_ADVANCE_GRACE_SEC,
+                "seen_playing": False,
+            }
+            self._set_timer(
+                "next",
+                self._status_poll_interval(),
+                self._poll_player_status,
+                self._status_watch,
+            )
+            self.log.info(
+                f"约 {sec} 秒后将会播放下一首歌曲(按设备状态) did: {self.did}"
+            )
+        else:
+            self._set_timer("next", sec, self._on_next_timer)
+            self.log.info(f"{sec} 秒后将会播放下一首歌曲 did: {self.did}")
+        self._set_prefetch_timeout(sec - self.config.prefetch_next_sec)
 
+    async def _on_next_timer(self):
+        """下一首定时器到点（或检测到歌曲播完）后的处理"""
+        try:
+            self.log.info(f"定时器时间到了 did: {self.did}")
+            if self.device.play_type == PLAY_TYPE_SIN:
+                self.log.info(f"单曲播放不继续播放下一首 did: {self.did}")
+                await self.stop(arg1="notts")
+            else:
+                await self._play_next_by_timer()
+        except Exception as e:
+            self.log.error(f"Execption {e}")
+
+    def _status_poll_interval(self):
+        """按剩余时长计算下一次轮询间隔：离结束越近越频繁"""
+        offset, duration = self.get_offset_duration()
+        remaining = duration - offset
+        if remaining > STATUS_POLL_NEAR_END_SEC:
+            interval = min(remaining - STATUS_POLL_NEAR_END_SEC, STATUS_POLL_MAX_SEC)
+        else:
+            interval = STATUS_POLL_MIN_SEC
+        return max(interval, STATUS_POLL_MIN_SEC)
+
+    async def _poll_player_status(self, watch):
+        """轮询一次组内设备播放状态，歌曲真正播完后播放下一首，否则继续定时轮询
+
+        每轮对整组设备只发起一次批量查询，并用设备上报的播放位置校准
+        _start_time/_paused_time。超过预计结束时间 STATUS_ADVANCE_GRACE_SEC
+        仍未检测到结束时，按定时器逻辑切歌。
+
+        Args:
+            watch: 本轮监视的状态，被取消或替换后不再处理
+        """
+        statuses = await self.group_get_player_status()
+        if watch is not self._status_watch:
+            return
+
+        status = statuses.get(self.device_id)
+        if status is not None:
+            self._reconcile_play_progress(status)
+        known = [s for s in statuses.values() if s is not None]
+        advance = False
+        if any(s.get("status") == 1 for s in known):
+            watch["seen_playing"] = True
+            # 还在播放，按校准后的进度顺延结束时间
+            offset, duration = self.get_offset_duration()
+            watch["deadline"] = max(
+                watch["deadline"],
+                time.time() + max(duration - offset, 0) + STATUS_ADVANCE_GRACE_SEC,
+            )
+        elif any(s.get("status") == 2 for s in known):
+            # 在音箱上暂停了，结束时间顺延
+            watch["deadline"] = max(
+                watch["deadline"], time.time() + STATUS_ADVANCE_GRACE_SEC
+            )
+        elif known and watch["seen_playing"]:
+            self.log.info(f"设备已播放结束 did: {self.did}")
+            advance = True
+
+        if not advance and time.time() >= watch["deadline"]:
+            self.log.info(f"超过预计结束时间仍未检测到播放结束 did: {self.did}")
+            advance = True
+
+        if advance:
+            self._status_watch = None
+            await self._on_next_timer()
+        else:
+            self._set_timer(
+                "next", self._status_poll_interval(), self._poll_player_status, watch
+            )
+
+    def _reconcile_play_progress(self, status):
+        """用设备上报的播放位置校准播放进度"""
+        detail = status.get("play_song_detail") or {}
+        position = detail.get("position")
+        if status.get("status") not in (1, 2) or position is None:
+            return
+        start_time = time.time() - position / 1000
+        # 轮询带来的毫秒级抖动不更新快照版本
+        changed = abs(start_time - self._start_time) > 1 or self._paused_time
+        self._start_time = start_time
+        self._paused_time = 0
+        duration = detail.get("duration", 0) / 1000
+        if duration > 0 and abs(duration - self._duration) > 1:
+            self.log.info(
+                f"按设备状态校准时长 did: {self.did} {self._duration} -> {duration}"
+            )
+            self._duration = duration
+            changed = True
+        if changed:
+            self._sync_playback_state()
+
+    async def group_get_player_status(self):
+        """批量获取组内所有设备的播放状态
+
+        Returns:
+            dict: {device_id: 播放状态}，获取失败的为 None
+        """
+        device_id_list = self.xiaomusic.device_manager.get_group_device_id_list(
+            self.group_name
+        )
+
+        async def _get_status(device_id):
+            try:
+                playing_info = await self.auth_manager.mina_service.player_get_status(
+                    device_id
+                )
+                return json.loads(playing_info.get("data", {}).get("info", "{}"))
             except Exception as e:
-                self.log.error(f"Execption {e}")
+                self.log.warning(f"获取播放状态失败 device_id:{device_id} {e}")
+                return None
+
+        results = await asyncio.gather(*[_get_status(i) for i in device_id_list])
+        statuses = dict(zip(device_id_list, results, strict=True))
+        self.log.debug(f"group_get_player_status {self.group_name} {statuses}")
+        return statuses
+
+    def _set_prefetch_timeout(self, sec):
+        """设置预取下一首的定时器"""
+        self._cancel_timer("prefetch")
+        if self.config.prefetch_next_sec <= 0:
+            return
+        if self.device.play_type == PLAY_TYPE_SIN:
+            return
+        self._set_timer("prefetch", sec, self._prefetch_next)
+
+    def _prefetch_key(self):
+        """预取结果依赖的播放状态，状态变了预取结果就作废"""
+        return (
+            self.get_cur_music(),
+            self.device.cur_playlist,
+            self.device.play_type,
+            len(self._play_list),
+        )
+
+    async def _prefetch_next(self):
+        """提前准备下一首：播放地址、时长、audio_id，以及本地文件的转码"""
+        # 下一首是自动添加的歌曲，切歌时才确定，不预取
+        if self._has_auto_add_song():
+            self._prefetched = None
+            return
+        name = self._get_play_next_name()
+        key = self._prefetch_key()
+        if self._prefetched and self._prefetched["key"] == key:
+            return
+        self._prefetched = None
+        if not name or name not in self._play_list:
+            return
+
+        music_library = self.xiaomusic.music_library
+        start = time.perf_counter()
+        url, _ = await music_library.get_music_url(name)
+        if not url:
+            return
+        duration, _, _ = await asyncio.gather(
+            music_library.get_music_duration(name, priority=PRIORITY_PREFETCH),
+            music_library.prepare_music_file(name),
+            self._get_audio_id(name),
+        )
+        # 准备期间播放状态变了，结果作废
+        if key != self._prefetch_key():
+            return
+        self._prefetched = {
+            "key": key,
+            "name": name,
+            "url": url,
+            "duration": duration,
+        }
+        self.log.info(
+            f"已预取下一首 did: {self.did} name: {name} duration: {duration} "
+            f"耗时: {time.perf_counter() - start:.3f} 秒"
+        )
 
-        self._next_timer = asyncio.create_task(_do_next())
-        self.log.info(f"{sec} 秒后将会播放下一首歌曲 did: {self.did}")
+    async def _play_next_by_timer(self):
+        """定时器到点后播放下一首，优先使用预取结果"""
+        prefetched = self._prefetched
+        self._prefetched = None
+        if not (prefetched and prefetched["key"] == self._prefetch_key()):
+            await self._play_next()
+            return
+        self.log.info(f"使用预取的下一首 did: {self.did} name: {prefetched['name']}")
+        await self._playmusic(prefetched["name"], prefetched=prefetched)
 
     async def set_volume(self, volume: int):
         """设置音量"""
@@ -865,6 +1223,7 @@ class XiaoMusicDevice:
         """停止播放"""
         self._last_cmd = "stop"
         self.is_playing = False
+        self._sync_playback_state()
         if arg1 != "notts":
             await self.do_tts(self.config.stop_tts_msg)
             await asyncio.sleep(3)  # 等它说完
@@ -874,44 +1233,61 @@ class XiaoMusicDevice:
         self.log.info("stop now")
 
     async def group_force_stop_xiaoai(self):
-        """强制停止组内所有设备"""
+        """强制停止组内所有设备
+
+        先并发暂停所有设备，再批量查询一次组内播放状态，只对仍在播放的设备发送停止
+        """
         device_id_list = self.xiaomusic.device_manager.get_group_device_id_list(
             self.group_name
         )
         self.log.info(f"group_force_stop_xiaoai {self.group_name} {device_id_list}")
-        tasks = [self.force_stop_xiaoai(device_id) for device_id in device_id_list]
-        results = await asyncio.gather(*tasks)
-        self.log.info(f"group_force_stop_xiaoai {device_id_list} {results}")
+        mina_service = self.auth_manager.mina_service
+
+        async def _call(func, device_id):
+            try:
+                ret = await func(device_id)
+                self.log.info(f"{func.__name__} device_id:{device_id} ret:{ret}")
+                return ret
+            except Exception as e:
+                self.log.warning(f"Execption {e}")
+                return None
+
+        results = await asyncio.gather(
+            *[_call(mina_service.player_pause, i) for i in device_id_list]
+        )
+        if self.config.enable_force_stop:
+            stop_list = device_id_list
+        else:
+            statuses = await self.group_get_player_status()
+            stop_list = [
+                device_id
+                for device_id, status in statuses.items()
+                if status and status.get("status") == 1
+            ]
+        if stop_list:
+            await asyncio.gather(
+                *[_call(mina_service.player_stop, i) for i in stop_list]
+            )
+        self.log.info(
+            f"group_force_stop_xiaoai {device_id_list} {results} stop: {stop_list}"
+        )
         return results
 
     async def stop_after_minute(self, minute: int):
         """定时关机"""
-        if self._stop_timer:
-            self._stop_timer.cancel()
-            self._stop_timer = None
+        if self._cancel_timer("stop"):
             self.log.info("关机定时器已取消")
 
-        async def _do_stop():
-            await asyncio.sleep(minute * 60)
-            try:
-                await self.stop(arg1="notts")
-            except Exception as e:
-                self.log.exception(f"Execption {e}")
-
-        self._stop_timer = asyncio.create_task(_do_stop())
+        self._set_timer("stop", minute * 60, self.stop, "notts")
         await self.do_tts(f"收到,{minute}分钟后将关机")
 
     async def cancel_next_timer(self):
         """取消下一首定时器"""
         self.log.info(f"cancel_next_timer did: {self.did}")
-        if self._next_timer:
-            self._next_timer.cancel()
-            try:
-                await self._next_timer
-            except asyncio.CancelledError:
-                pass
+        self._status_watch = None
+        self._cancel_timer("prefetch")
+        if self._cancel_timer("next"):
             self.log.info(f"下一曲定时器已取消 did: {self.did}")
-            self._next_timer = None
         else:
             self.log.info(f"下一曲定时器不见了 did: {self.did}")
 
@@ -927,22 +1303,12 @@ class XiaoMusicDevice:
         return self.device.cur_playlist
 
     def cancel_all_timer(self):
-        """清空所有定时器"""
+        """清空下一首、预取、定时关机和 TTS 定时器"""
         self.log.info("in cancel_all_timer")
-        if self._next_timer:
-            self._next_timer.cancel()
-            self._next_timer = None
-            self.log.info("cancel_all_timer _next_timer.cancel")
-
-        if self._stop_timer:
-            self._stop_timer.cancel()
-            self._stop_timer = None
-            self.log.info("cancel_all_timer _stop_timer.cancel")
-
-        if self._tts_timer:
-            self._tts_timer.cancel()
-            self._tts_timer = None
-            self.log.info("cancel_all_timer _tts_timer.cancel")
+        self._status_watch = None
+        for name in ("next", "prefetch", "stop", "tts"):
+            if self._cancel_timer(name):
+                self.log.info(f"cancel_all_timer {name}")
 
     @classmethod
     def dict_clear(cls, d):
@@ -1,13 +1,54 @@
 """事件系统模块
 
 提供简单的事件发布-订阅机制，用于模块间的解耦通信。
+
+事件循环运行时，发布的事件放入队列，由后台任务依次投递给订阅者，
+订阅者可以是普通函数或协程函数，不会阻塞发布方。配置了合并窗口的事件，
+窗口内重复发布的相同事件只投递一次。积压过多时丢弃最早的事件，
+配置变更事件除外。没有运行中的事件循环时同步投递。
 """
 
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
 from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from xiaomusic.const import (
+    EVENT_COALESCE_SEC,
+    EVENT_FLUSH_TIMEOUT_SEC,
+    EVENT_QUEUE_SIZE,
+)
+
+log = logging.getLogger(__package__)
 
 # 事件类型常量
 CONFIG_CHANGED = "config_changed"
 DEVICE_CONFIG_CHANGED = "device_config_changed"
+PLAYBACK_STATE_CHANGED = "playback_state_changed"  # 参数: did
+
+# 需要合并的事件，配置变更通常成批出现，合并后只触发一次保存
+DEFAULT_COALESCE_EVENTS = {
+    CONFIG_CHANGED: EVENT_COALESCE_SEC,
+    DEVICE_CONFIG_CHANGED: EVENT_COALESCE_SEC,
+}
+
+# 订阅者负责保存配置的事件，队列满时也不丢弃，否则修改可能不会写入文件
+NO_DROP_EVENTS = {CONFIG_CHANGED, DEVICE_CONFIG_CHANGED}
+
+
+@dataclass(frozen=True)
+class Event:
+    """队列中等待投递的一次发布，只在事件总线内部使用
+
+    订阅者收到的仍是发布时传入的关键字参数，不是这个对象
+    """
+
+    type: str
+    data: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
 
 
 class EventBus:
@@ -16,16 +57,33 @@ class EventBus:
     实现简单的发布-订阅模式，支持事件的订阅、取消订阅和发布。
     """
 
-    def __init__(self):
-        """初始化事件总线"""
+    def __init__(self, coalesce: dict | None = None, queue_size=EVENT_QUEUE_SIZE):
+        """初始化事件总线
+
+        Args:
+            coalesce: {事件类型: 合并窗口秒数}，默认合并配置变更事件
+            queue_size: 可丢弃事件的最大排队数，超过后丢弃最早的可丢弃事件，
+                NO_DROP_EVENTS 中的事件不计数也不丢弃
+        """
         self._subscribers: dict[str, list[Callable]] = {}
+        self._coalesce = dict(DEFAULT_COALESCE_EVENTS if coalesce is None else coalesce)
+        self._queue_size = queue_size
+        self._queue = None
+        self._dispatcher = None
+        # 队列中可丢弃的事件，按入队顺序
+        self._droppable: deque[Event] = deque()
+        # 已丢弃但还在队列中的事件 id，投递时跳过
+        self._dropped_ids: set[int] = set()
+        # 合并窗口内等待投递的事件 {(事件类型, 参数): Event}
+        self._pending: dict[tuple, Event] = {}
+        self._stats = {"published": 0, "delivered": 0, "coalesced": 0, "dropped": 0}
 
     def subscribe(self, event_type: str, callback: Callable) -> None:
         """订阅事件
 
         Args:
             event_type: 事件类型
-            callback: 回调函数
+            callback: 回调函数，可以是普通函数或协程函数
         """
         if event_type not in self._subscribers:
             self._subscribers[event_type] = []
@@ -43,6 +101,13 @@ class EventBus:
             if callback in self._subscribers[event_type]:
                 self._subscribers[event_type].remove(callback)
 
+    def set_coalesce(self, event_type: str, delay: float) -> None:
+        """设置事件的合并窗口，delay 为 0 表示不合并"""
+        if delay > 0:
+            self._coalesce[event_type] = delay
+        else:
+            self._coalesce.pop(event_type, None)
+
     def publish(self, event_type: str, **kwargs) -> None:
         """发布事件
 
@@ -50,10 +115,116 @@ class EventBus:
             event_type: 事件类型
             **kwargs: 事件参数
         """
-        if event_type in self._subscribers:
-            for callback in self._subscribers[event_type]:
-                try:
-                    callback(**kwargs)
-                except Exception as e:
-                    # 避免某个订阅者的异常影响其他订阅者
-                    print(f"Error in event callback for {event_type}: {e}")
+        self._stats["published"] += 1
+        if event_type not in self._subscribers:
+            return
+        event = Event(event_type, kwargs)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._deliver_sync(event)
+            return
+
+        delay = self._coalesce.get(event_type)
+        try:
+            key = (event_type, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            # 参数不可哈希时不合并
+            delay = 0
+        if delay:
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+                return
+            self._pending[key] = event
+            loop.call_later(delay, self._release, key)
+            return
+        self._enqueue(event)
+
+    async def flush(self, timeout: float = EVENT_FLUSH_TIMEOUT_SEC) -> None:
+        """立即投递合并窗口中的事件，等待队列中的事件投递完后停止投递任务
+
+        用于退出前，之后再发布事件会重新启动投递任务
+
+        Args:
+            timeout: 最长等待时间（秒），超时后未投递的事件被丢弃
+        """
+        for key in list(self._pending):
+            self._release(key)
+        if self._dispatcher is None or self._dispatcher.done():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"等待事件投递超时，丢弃 {self._queue.qsize()} 个事件")
+        self._dispatcher.cancel()
+        self._dispatcher = None
+
+    def get_stats(self) -> dict:
+        """事件投递统计"""
+        stats = dict(self._stats)
+        stats["pending"] = len(self._pending)
+        stats["queued"] = (
+            self._queue.qsize() - len(self._dropped_ids)
+            if self._queue is not None
+            else 0
+        )
+        return stats
+
+    def _release(self, key):
+        event = self._pending.pop(key, None)
+        if event is not None:
+            self._enqueue(event)
+
+    def _enqueue(self, event: Event):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._queue = asyncio.Queue()
+            self._droppable.clear()
+            self._dropped_ids.clear()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        if event.type not in NO_DROP_EVENTS:
+            if len(self._droppable) >= self._queue_size:
+                dropped = self._droppable.popleft()
+                self._dropped_ids.add(id(dropped))
+                self._stats["dropped"] += 1
+                log.warning(f"事件队列已满，丢弃事件 {dropped.type}")
+            self._droppable.append(event)
+        self._queue.put_nowait(event)
+
+    async def _dispatch(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                if event.type in NO_DROP_EVENTS:
+                    await self._deliver(event)
+                elif id(event) in self._dropped_ids:
+                    self._dropped_ids.discard(id(event))
+                else:
+                    self._droppable.popleft()
+                    await self._deliver(event)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, event: Event):
+        for callback in list(self._subscribers.get(event.type, ())):
+            try:
+                result = callback(**event.data)
+                if inspect.isawaitable(result):
+                    await result
+                self._stats["delivered"] += 1
+            except Exception as e:
+                # 避免某个订阅者的异常影响其他订阅者
+                log.exception(f"Error in event callback for {event.type}: {e}")
+
+    def _deliver_sync(self, event: Event):
+        for callback in list(self._subscribers.get(event.type, ())):
+            try:
+                result = callback(**event.data)
+                if inspect.iscoroutine(result):
+                    # 没有事件循环，协程订阅者无法执行
+                    result.close()
+                    log.warning(f"没有运行中的事件循环，跳过 {event.type} 的异步订阅者")
+                    continue
+                self._stats["delivered"] += 1
+            except Exception as e:
+                log.exception(f"Error in event callback for {event.type}: {e}")
@@ -17,16 +17,30 @@ from urllib.parse import urlparse
 
 from xiaomusic.const import SUPPORT_MUSIC_TYPE
 from xiaomusic.events import CONFIG_CHANGED
+from xiaomusic.play_queue import SortedMusicList
+from xiaomusic.playlist_store import PlaylistStore
+from xiaomusic.tag_job_queue import (
+    PRIORITY_BULK,
+    PRIORITY_PLAYING,
+    PRIORITY_UI,
+    PRIORITY_WRITE,
+    TagJobQueue,
+)
 from xiaomusic.utils.file_utils import not_in_dirs, traverse_music_directory
+from xiaomusic.utils.http_client import cookie_session
 from xiaomusic.utils.music_utils import (
     Metadata,
-    extract_audio_metadata,
+    convert_file_to_mp3,
+    extract_audio_info,
     get_local_music_duration,
+    get_local_music_durations,
     get_web_music_duration,
+    is_mp3,
+    remove_id3_tags,
     save_picture_by_base64,
     set_music_tag_to_file,
 )
-from xiaomusic.utils.network_utils import MusicUrlCache
+from xiaomusic.utils.network_utils import MusicUrlCache, PersistentTTLCache
 from xiaomusic.utils.system_utils import try_add_access_control_param
 from xiaomusic.utils.text_utils import custom_sort_key, find_best_match, fuzzyfinder
 
@@ -63,10 +77,14 @@ class MusicLibrary:
         self.music_list = {}  # 播放列表 {list_name: [music_names]}
         self.default_music_list_names = []  # 非自定义歌单名称列表
         self.custom_play_list = None  # 自定义播放列表缓存
+        # 自定义歌单和网络歌单的存储
+        self.playlist_store = PlaylistStore(config.getplaylistdbfile())
+        self._sorted_music_lists = {}  # 排序后的歌单，各设备共享 {list_name: SortedMusicList}
 
         # 网络音乐相关
         self._all_radio = {}  # 所有电台
         self._web_music_api = {}  # 需要通过API获取的网络音乐
+        self._stream_music = {}  # 边下边播的歌曲 {name: (音频流地址, 时长)}
 
         # 搜索索引
         self._extra_index_search = {}  # 额外搜索索引 {filepath: name}
@@ -74,7 +92,12 @@ class MusicLibrary:
         # 标签管理
         self.all_music_tags = {}  # 音乐标签缓存
         self._tag_generation_task = False  # 标签生成任务标志
-        self._web_music_duration_cache = {}  # 网络音乐时长缓存（仅内存）
+        self._tag_jobs = TagJobQueue()  # 标签任务优先级队列
+        # 网络音乐时长缓存 {url: duration}，持久化到 cache 目录
+        self._web_music_duration_cache = PersistentTTLCache(
+            config.web_music_duration_cache_path,
+            ttl_sec=config.web_music_duration_cache_days * 24 * 3600,
+        )
 
         # URL处理相关
         self.url_cache = MusicUrlCache()  # URL缓存
@@ -84,6 +107,7 @@ class MusicLibrary:
 
         扫描音乐目录，生成本地音乐列表和播放列表。
         """
+        self._import_legacy_playlists()
         self.all_music = {}
         all_music_by_dir = {}
 
@@ -177,19 +201,57 @@ class MusicLibrary:
         # all_music 更新，重建 tag（仅在事件循环启动后才会执行）
         self.try_gen_all_music_tag()
 
+    def _import_legacy_playlists(self):
+        """把配置里旧格式的歌单 JSON 导入歌单数据库，并清空配置中的歌单内容"""
+        changed = False
+        if self.config.music_list_json:
+            try:
+                self.import_music_list_json(self.config.music_list_json)
+                self.config.music_list_json = ""
+                changed = True
+            except Exception as e:
+                self.log.exception(f"导入网络歌单失败: {e}")
+        if self.config.custom_play_list_json:
+            try:
+                self.import_custom_play_list_json(self.config.custom_play_list_json)
+                self.config.custom_play_list_json = ""
+                changed = True
+            except Exception as e:
+                self.log.exception(f"导入自定义歌单失败: {e}")
+        # 配置里不再保存歌单，保存一次去掉旧内容
+        if changed and self.event_bus:
+            self.event_bus.publish(CONFIG_CHANGED)
+
+    def import_music_list_json(self, content):
+        """导入 music_list_json 格式的网络歌单，替换现有网络歌单"""
+        self.playlist_store.import_music_list_json(content)
+        self.log.info("网络歌单已导入歌单数据库")
+
+    def export_music_list_json(self):
+        """导出 music_list_json 格式的网络歌单"""
+        return self.playlist_store.export_music_list_json()
+
+    def import_custom_play_list_json(self, content):
+        """导入 custom_play_list_json 格式的自定义歌单，替换现有自定义歌单"""
+        self.playlist_store.import_custom_play_list_json(content)
+        self.custom_play_list = None
+        self.log.info("自定义歌单已导入歌单数据库")
+
+    def export_custom_play_list_json(self):
+        """导出 custom_play_list_json 格式的自定义歌单"""
+        return self.playlist_store.export_custom_play_list_json()
+
     def _append_music_list(self):
         """给歌单里补充网络歌单"""
-        if not self.config.music_list_json:
+        web_music_lists = self.playlist_store.get_web_music_lists()
+        if not web_music_lists:
             return
 
         self._all_radio = {}
         self._web_music_api = {}
-        music_list = json.loads(self.config.music_list_json)
 
         try:
-            for item in music_list:
-                list_name = item.get("name")
-                musics = item.get("musics")
+            for list_name, musics in web_music_lists.items():
                 if (not list_name) or (not musics):
                     continue
 
@@ -234,9 +296,7 @@ class MusicLibrary:
             )
             if changed:
                 self.custom_play_list = custom_play_list
-                self.config.custom_play_list_json = json.dumps(
-                    custom_play_list, ensure_ascii=False
-                )
+                self.playlist_store.replace_custom_play_lists(custom_play_list)
 
             for k, v in custom_play_list.items():
                 self.music_list[k] = list(v)
@@ -292,21 +352,27 @@ class MusicLibrary:
             dict: 自定义播放列表字典
         """
         if self.custom_play_list is None:
-            self.custom_play_list = {}
-            if self.config.custom_play_list_json:
-                self.custom_play_list = json.loads(self.config.custom_play_list_json)
+            # 复制一份，歌单修改后再逐个写回数据库
+            self.custom_play_list = {
+                name: list(musics)
+                for name, musics in self.playlist_store.get_custom_play_lists().items()
+            }
         return self.custom_play_list
 
-    def save_custom_play_list(self):
-        """保存自定义播放列表"""
+    def save_custom_play_list(self, name):
+        """保存一个自定义歌单
+
+        只写入该歌单的记录，歌单已从缓存中删除时同时从数据库删除
+
+        Args:
+            name: 歌单名称
+        """
         custom_play_list = self.get_custom_play_list()
+        if name in custom_play_list:
+            self.playlist_store.set_custom_play_list(name, custom_play_list[name])
+        else:
+            self.playlist_store.delete_custom_play_list(name)
         self.refresh_custom_play_list()
-        self.config.custom_play_list_json = json.dumps(
-            custom_play_list, ensure_ascii=False
-        )
-        # 发布配置变更事件
-        if self.event_bus:
-            self.event_bus.publish(CONFIG_CHANGED)
 
     # ==================== 播放列表管理 ====================
 
@@ -326,7 +392,7 @@ class MusicLibrary:
         if name in custom_play_list:
             return False
         custom_play_list[name] = []
-        self.save_custom_play_list()
+        self.save_custom_play_list(name)
         return True
 
     def play_list_del(self, name):
@@ -342,7 +408,7 @@ class MusicLibrary:
         if name not in custom_play_list:
             return False
         custom_play_list.pop(name)
-        self.save_custom_play_list()
+        self.save_custom_play_list(name)
         return True
 
     def play_list_update_name(self, oldname, newname):
@@ -369,9 +435,28 @@ class MusicLibrary:
         play_list = custom_play_list[oldname]
         custom_play_list.pop(oldname)
         custom_play_list[newname] = play_list
-        self.save_custom_play_list()
+        self.playlist_store.rename_custom_play_list(oldname, newname)
+        self.refresh_custom_play_list()
         return True
 
+    def get_sorted_music_list(self, list_name):
+        """获取排序后的歌单，同一个歌单在所有设备间共享
+
+        歌单重新生成后会换成新的列表对象，这时重新排序
+
+        Args:
+            list_name: 歌单名称
+
+        Returns:
+            SortedMusicList: 排序后的歌单
+        """
+        source = self.music_list[list_name]
+        sorted_list = self._sorted_music_lists.get(list_name)
+        if sorted_list is None or sorted_list.is_stale(source):
+            sorted_list = SortedMusicList(source)
+            self._sorted_music_lists[list_name] = sorted_list
+        return sorted_list
+
     def get_play_list_names(self):
         """获取所有自定义歌单名称
 
@@ -419,64 +504,73 @@ class MusicLibrary:
 
         # 直接覆盖
         custom_play_list[name] = play_list
-        self.save_custom_play_list()
+        self.save_custom_play_list(name)
         return True
 
     def update_music_list_json(self, list_name, update_list, append=False):
         """
-        更新配置的音乐歌单Json，如果歌单存在则根据 append：False:覆盖； True:追加
+        更新网络歌单，如果歌单存在则根据 append：False:覆盖； True:追加
+        只写入该歌单在歌单数据库中的记录
+
         Args:
             list_name: 更新的歌单名称
             update_list: 更新的歌单列表
             append: 追加歌曲，默认 False
-
-        Returns:
-            list: 转换后的音乐项目列表
         """
-        # 更新配置中的音乐列表
-        if self.config.music_list_json:
-            music_list = json.loads(self.config.music_list_json)
-        else:
-            music_list = []
-
-        # 检查是否已存在同名歌单
-        existing_index = None
-        for i, item in enumerate(music_list):
-            if item.get("name") == list_name:
-                existing_index = i
-                break
-
         # 构建新歌单数据
         new_music_items = [
             {"name": item["name"], "url": item["url"], "type": item["type"]}
             for item in update_list
         ]
 
-        if existing_index is not None:
-            if append:
-                # 追加模式：将新项目添加到现有歌单中，避免重复
-                existing_musics = music_list[existing_index]["musics"]
-                existing_names = {music["name"] for music in existing_musics}
-
-                # 只添加不存在的项目
-                for new_item in new_music_items:
-                    if new_item["name"] not in existing_names:
-                        existing_musics.append(new_item)
+        existing_musics = self.playlist_store.get_web_music_lists().get(list_name)
+        if existing_musics is not None and append:
+            # 追加模式：将新项目添加到现有歌单中，避免重复
+            musics = list(existing_musics)
+            existing_names = {music["name"] for music in musics}
 
-                music_list[existing_index]["musics"] = existing_musics
-            else:
-                # 覆盖模式：替换整个歌单
-                music_list[existing_index] = {
-                    "name": list_name,
-                    "musics": new_music_items,
-                }
+            # 只添加不存在的项目
+            for new_item in new_music_items:
+                if new_item["name"] not in existing_names:
+                    musics.append(new_item)
         else:
-            # 添加新歌单
-            new_music_list = {"name": list_name, "musics": new_music_items}
-            music_list.append(new_music_list)
+            # 覆盖模式或新歌单
+            musics = new_music_items
+
+        self.playlist_store.set_web_music_list(list_name, musics)
+
+    def append_web_music(self, list_name, music_items):
+        """把网络歌曲追加到网络歌单
+
+        只登记新增的歌曲，不重新扫描音乐目录。"全部"等汇总歌单在下次重新生成时更新
 
-        # 保存更新后的配置
-        self.config.music_list_json = json.dumps(music_list, ensure_ascii=False)
+        Args:
+            list_name: 网络歌单名称
+            music_items: 歌曲列表 [{"name", "url", "type"}]
+
+        Returns:
+            list: 实际新增的歌曲名称
+        """
+        old_names = self.music_list.get(list_name, [])
+        existing = set(old_names)
+        new_items = [item for item in music_items if item["name"] not in existing]
+        if not new_items:
+            return []
+
+        self.update_music_list_json(list_name, new_items, append=True)
+        for item in new_items:
+            name, url = item["name"], item["url"]
+            self.all_music[name] = url
+            if item.get("type") == "radio":
+                self._all_radio[name] = url
+            else:
+                self._extra_index_search[url] = name
+        # 换成新的列表对象，设备共享的排序歌单会随之更新
+        new_names = [item["name"] for item in new_items]
+        self.music_list[list_name] = sorted(
+            [*old_names, *new_names], key=custom_sort_key
+        )
+        return new_names
 
     def play_list_add_music(self, name, music_list):
         """歌单新增歌曲
@@ -499,7 +593,7 @@ class MusicLibrary:
             if (music_name in self.all_music) and (music_name not in play_list):
                 play_list.append(music_name)
 
-        self.save_custom_play_list()
+        self.save_custom_play_list(name)
         return True
 
     def play_list_del_music(self, name, music_list):
@@ -521,7 +615,7 @@ class MusicLibrary:
             if music_name in play_list:
                 play_list.remove(music_name)
 
-        self.save_custom_play_list()
+        self.save_custom_play_list(name)
         return True
 
     # ==================== 音乐搜索 ====================
@@ -693,6 +787,35 @@ class MusicLibrary:
         """
         return name in self._web_music_api
 
+    def set_stream_music(self, name, url, duration=0):
+        """临时把歌曲指向源站音频流，下载完成前通过代理播放
+
+        Args:
+            name: 歌曲名称
+            url: 音频流地址
+            duration: yt-dlp 元数据里的时长（秒），未知时为 0
+        """
+        self._stream_music[name] = (url, duration)
+        self.all_music[name] = url
+
+    def remove_stream_music(self, name):
+        """移除边下边播的临时音频流
+
+        Args:
+            name: 歌曲名称
+
+        Returns:
+            bool: 歌曲是否处于边下边播状态
+        """
+        stream = self._stream_music.pop(name, None)
+        if stream is None:
+            return False
+        url, _ = stream
+        # 只有还指向音频流时才删除，已经切换到本地文件的保持不变
+        if self.all_music.get(name) == url:
+            del self.all_music[name]
+        return True
+
     # ==================== 标签管理 ====================
 
     async def get_music_tags(self, name):
@@ -719,19 +842,21 @@ class MusicLibrary:
                 f"{self.config.hostname}:{self.config.public_port}/picture/{encoded_name}",
             )
 
-        # 如果是网络音乐，获取时长
-        if self.is_web_music(name):
+        # 网络音乐或还没有时长的本地音乐，获取时长
+        if self.is_web_music(name) or not tags.get("duration"):
             try:
-                duration = await self.get_music_duration(name)
+                duration = await self.get_music_duration(name, priority=PRIORITY_UI)
                 if duration > 0:
                     tags["duration"] = duration
             except Exception as e:
-                self.log.exception(f"获取网络音乐 {name} 时长失败: {e}")
+                self.log.exception(f"获取音乐 {name} 时长失败: {e}")
         return tags
 
-    def set_music_tag(self, name, info):
+    async def set_music_tag(self, name, info):
         """修改标签信息
 
+        后台构建 tag 时不再拒绝，而是在标签任务队列中优先执行
+
         Args:
             name: 音乐名称
             info: 标签信息对象
@@ -739,10 +864,12 @@ class MusicLibrary:
         Returns:
             str: 操作结果消息
         """
-        if self._tag_generation_task:
-            self.log.info("tag 更新中，请等待")
-            return "Tag generation task running"
+        return await self._tag_jobs.submit(
+            PRIORITY_WRITE, self._set_music_tag, name, info
+        )
 
+    def _set_music_tag(self, name, info):
+        """修改标签信息（在标签任务队列中执行）"""
         tags = copy.copy(self.all_music_tags.get(name, asdict(Metadata())))
         tags["title"] = info.title
         tags["artist"] = info.artist
@@ -764,7 +891,9 @@ class MusicLibrary:
         self.try_save_tag_cache()
         return "OK"
 
-    async def get_music_duration(self, name: str) -> float:
+    async def get_music_duration(
+        self, name: str, priority: int = PRIORITY_PLAYING
+    ) -> float:
         """获取歌曲时长
 
         优先从缓存中读取，如果缓存中没有则获取并缓存
@@ -772,6 +901,7 @@ class MusicLibrary:
 
         Args:
             name: 歌曲名称
+            priority: 本地音乐需要解析文件时，在标签任务队列中的优先级
 
         Returns:
             float: 歌曲时长（秒），失败返回 0
@@ -786,12 +916,19 @@ class MusicLibrary:
             self.log.info(f"电台 {name} 不会有播放时长")
             return 0
 
-        # 网络音乐：使用内存缓存
+        # 边下边播：音频流地址是临时的，不去探测也不缓存，直接用 yt-dlp 给出的时长
+        if name in self._stream_music:
+            _, duration = self._stream_music[name]
+            self.log.info(f"边下边播歌曲 {name} 时长: {duration} 秒")
+            return duration
+
+        # 网络音乐：使用按源地址缓存的时长
         if self.is_web_music(name):
-            # 先检查内存缓存
-            if name in self._web_music_duration_cache:
-                duration = self._web_music_duration_cache[name]
-                self.log.debug(f"从内存缓存读取网络音乐 {name} 时长: {duration} 秒")
+            # 先检查缓存
+            source_url = self.all_music[name]
+            duration = self._web_music_duration_cache.get(source_url, 0)
+            if duration > 0:
+                self.log.debug(f"从缓存读取网络音乐 {name} 时长: {duration} 秒")
                 return duration
 
             # 缓存中没有，获取时长
@@ -800,10 +937,10 @@ class MusicLibrary:
                 duration, _ = await get_web_music_duration(url, self.config)
                 self.log.info(f"网络音乐 {name} 时长: {duration} 秒")
 
-                # 存入内存缓存（不持久化）
+                # 存入缓存并持久化
                 if duration > 0:
-                    self._web_music_duration_cache[name] = duration
-                    self.log.info(f"已缓存网络音乐 {name} 时长到内存: {duration} 秒")
+                    self._web_music_duration_cache.set(source_url, duration)
+                    self.log.info(f"已缓存网络音乐 {name} 时长: {duration} 秒")
 
                 return duration
             except Exception as e:
@@ -819,26 +956,44 @@ class MusicLibrary:
                 return duration
 
         # 缓存中没有，需要获取时长
-        duration = 0
         try:
-            filename = self.all_music[name]
-            if os.path.exists(filename):
-                duration = await get_local_music_duration(filename, self.config)
-                self.log.info(f"本地音乐 {name} 时长: {duration} 秒")
-            else:
-                self.log.warning(f"本地音乐文件 {filename} 不存在")
-
-            # 获取到时长后，更新到缓存并持久化
-            if duration > 0:
-                if name not in self.all_music_tags:
-                    self.all_music_tags[name] = asdict(Metadata())
-                self.all_music_tags[name]["duration"] = duration
-                # 保存缓存
-                self.try_save_tag_cache()
-                self.log.info(f"已缓存本地音乐 {name} 时长: {duration} 秒")
-
+            return await self._tag_jobs.submit(
+                priority, self._get_local_music_duration, name
+            )
         except Exception as e:
             self.log.exception(f"获取本地音乐 {name} 时长失败: {e}")
+            return 0
+
+    async def _get_local_music_duration(self, name: str) -> float:
+        """获取本地音乐时长并缓存（在标签任务队列中执行）"""
+        # 排队期间可能已经由其他任务获取到了
+        duration = self.all_music_tags.get(name, {}).get("duration", 0)
+        if duration > 0:
+            return duration
+
+        filename = self.all_music[name]
+        # 还没有解析过标签的歌曲，顺便解析标签，避免之后重复打开文件
+        await self._extract_music_tag(name, filename)
+        duration = self.all_music_tags.get(name, {}).get("duration", 0)
+        if duration > 0:
+            self.log.info(f"本地音乐 {name} 时长: {duration} 秒")
+            self.try_save_tag_cache()
+            return duration
+
+        if os.path.exists(filename):
+            duration = await get_local_music_duration(filename, self.config)
+            self.log.info(f"本地音乐 {name} 时长: {duration} 秒")
+        else:
+            self.log.warning(f"本地音乐文件 {filename} 不存在")
+
+        # 获取到时长后，更新到缓存并持久化
+        if duration > 0:
+            if name not in self.all_music_tags:
+                self.all_music_tags[name] = asdict(Metadata())
+            self.all_music_tags[name]["duration"] = duration
+            # 保存缓存
+            self.try_save_tag_cache()
+            self.log.info(f"已缓存本地音乐 {name} 时长: {duration} 秒")
 
         return duration
 
@@ -923,48 +1078,49 @@ class MusicLibrary:
             asyncio.ensure_future(self._gen_all_music_tag(only_items))
             self.log.info("启动后台构建 tag cache")
 
-    async def _gen_all_music_tag(self, only_items=None):
+    async def _gen_all_music_tag(self, only_items=None, priority=PRIORITY_BULK):
         """生成所有音乐标签（异步）
 
+        每首歌作为一个任务提交到标签任务队列，交互请求可以插到前面执行
+
         Args:
             only_items: 仅更新指定的音乐项，None表示更新全部
+            priority: 任务优先级，后台构建使用 PRIORITY_BULK
         """
-        self._tag_generation_task = True
+        is_bulk = priority == PRIORITY_BULK
+        if is_bulk:
+            self._tag_generation_task = True
         if only_items is None:
             only_items = self.all_music  # 默认更新全部
 
         all_music_tags = self.try_load_from_tag_cache()
         all_music_tags.update(self.all_music_tags)  # 保证最新
+        self.all_music_tags = all_music_tags
 
         ignore_tag_absolute_dirs = self.config.get_ignore_tag_dirs()
         self.log.info(f"ignore_tag_absolute_dirs: {ignore_tag_absolute_dirs}")
 
-        for name, file_or_url in only_items.items():
+        pending_duration = {}  # {name: filename}
+        for name, file_or_url in list(only_items.items()):
             # 跳过网络音乐
             if self.is_web_music(name):
                 continue
             start = time.perf_counter()
-            if name not in all_music_tags:
-                try:
-                    if os.path.exists(file_or_url) and not_in_dirs(
-                        file_or_url, ignore_tag_absolute_dirs
-                    ):
-                        all_music_tags[name] = extract_audio_metadata(
-                            file_or_url, self.config.picture_cache_path
-                        )
-                    else:
-                        self.log.info(f"{name} {file_or_url} 无法更新 tag")
-                except BaseException as e:
-                    self.log.exception(f"{e} {file_or_url} error {type(file_or_url)}!")
-
-            # 获取并缓存歌曲时长（仅本地音乐）
-            if name in all_music_tags and "duration" not in all_music_tags[name]:
-                try:
-                    duration = await self.get_music_duration(name)
-                    if duration > 0:
-                        all_music_tags[name]["duration"] = duration
-                except Exception as e:
-                    self.log.warning(f"获取歌曲 {name} 时长失败: {e}")
+            try:
+                await self._tag_jobs.submit(
+                    priority,
+                    self._extract_music_tag,
+                    name,
+                    file_or_url,
+                    ignore_tag_absolute_dirs,
+                )
+            except Exception as e:
+                self.log.exception(f"{e} {file_or_url} error {type(file_or_url)}!")
+
+            # 缺少时长的歌曲稍后批量获取（仅本地音乐）
+            tags = self.all_music_tags.get(name)
+            if tags is not None and "duration" not in tags:
+                pending_duration[name] = file_or_url
 
             if (time.perf_counter() - start) < 1:
                 await asyncio.sleep(0.001)
@@ -972,13 +1128,71 @@ class MusicLibrary:
                 # 处理一首歌超过1秒，则等1秒，解决挂载网盘卡死的问题
                 await asyncio.sleep(1)
 
-        # 全部更新结束后，一次性赋值
-        self.all_music_tags = all_music_tags
+        await self._gen_music_durations(pending_duration, priority)
+
         # 刷新 tag cache
         self.try_save_tag_cache()
-        self._tag_generation_task = False
+        if is_bulk:
+            self._tag_generation_task = False
         self.log.info("tag 更新完成")
 
+    async def _extract_music_tag(self, name, filename, ignore_tag_absolute_dirs=None):
+        """解析单个本地音乐文件的标签（在标签任务队列中执行）
+
+        Args:
+            name: 音乐名称
+            filename: 文件路径
+            ignore_tag_absolute_dirs: 不解析标签的目录，None 表示从配置读取
+        """
+        if name in self.all_music_tags:
+            return
+        if ignore_tag_absolute_dirs is None:
+            ignore_tag_absolute_dirs = self.config.get_ignore_tag_dirs()
+        if not (
+            os.path.exists(filename) and not_in_dirs(filename, ignore_tag_absolute_dirs)
+        ):
+            self.log.info(f"{name} {filename} 无法更新 tag")
+            return
+
+        # 每个文件只解析一次，同时拿到标签、封面和时长
+        loop = asyncio.get_running_loop()
+        metadata, duration = await loop.run_in_executor(
+            None, extract_audio_info, filename, self.config.picture_cache_path
+        )
+        # ffprobe 模式下时长以 ffprobe 为准，否则直接使用解析标签时得到的时长
+        if self.config.get_duration_type != "ffprobe" and duration > 0:
+            metadata["duration"] = duration
+        self.all_music_tags[name] = metadata
+
+    async def _gen_music_durations(self, pending, priority, batch_size=8):
+        """分批获取本地音乐时长并写入标签
+
+        Args:
+            pending: 需要获取时长的 {name: filename}
+            priority: 任务优先级
+            batch_size: 每批文件数量，每批作为一个任务执行
+        """
+        items = list(pending.items())
+        for i in range(0, len(items), batch_size):
+            batch = dict(items[i : i + batch_size])
+            try:
+                await self._tag_jobs.submit(
+                    priority, self._gen_music_durations_batch, batch
+                )
+            except Exception as e:
+                self.log.warning(f"批量获取歌曲时长失败: {e}")
+                continue
+            self.log.info(f"已获取 {i + len(batch)}/{len(items)} 首歌曲时长")
+
+    async def _gen_music_durations_batch(self, batch):
+        """获取一批本地音乐时长（在标签任务队列中执行）"""
+        durations = await get_local_music_durations(list(batch.values()), self.config)
+        for name, filename in batch.items():
+            duration = durations.get(filename, 0)
+            tags = self.all_music_tags.get(name)
+            if duration > 0 and tags is not None:
+                tags["duration"] = duration
+
     # ==================== 辅助方法 ====================
 
     def get_music_list(self):
@@ -1016,11 +1230,15 @@ class MusicLibrary:
     def clear_web_music_duration_cache(self):
         """清空网络音乐时长缓存
 
-        清空内存中的网络音乐时长缓存，不影响本地音乐的缓存
+        清空内存和文件中的网络音乐时长缓存，不影响本地音乐的缓存
         """
-        self._web_music_duration_cache = {}
+        self._web_music_duration_cache.clear()
         self.log.info("已清空网络音乐时长缓存")
 
+    def flush_caches(self):
+        """立即写入延迟保存的网络音乐时长缓存"""
+        self._web_music_duration_cache.flush()
+
     # ==================== URL处理方法 ====================
 
     async def get_music_url(self, name):
@@ -1037,6 +1255,31 @@ class MusicLibrary:
             return await self._get_web_music_url(name)
         return self._get_local_music_url(name), None
 
+    async def prepare_music_file(self, name):
+        """预先处理本地音乐文件（去除 ID3 标签、转码为 MP3）
+
+        播放时访问 /music 会直接命中处理好的临时文件，不用在请求里等待转码
+
+        Args:
+            name: 歌曲名称
+        """
+        if self.is_web_music(name):
+            return
+        filename = self.get_filename(name)
+        if not filename:
+            return
+        filename = os.path.abspath(filename)
+        loop = asyncio.get_running_loop()
+        try:
+            if self.config.remove_id3tag and is_mp3(filename):
+                await loop.run_in_executor(None, remove_id3_tags, filename, self.config)
+            elif self.config.convert_to_mp3 and not is_mp3(filename):
+                await loop.run_in_executor(
+                    None, convert_file_to_mp3, filename, self.config
+                )
+        except Exception as e:
+            self.log.warning(f"预处理音乐文件 {filename} 失败: {e}")
+
     async def _get_web_music_url(self, name):
         """获取网络音乐播放地址
 
@@ -1057,7 +1300,12 @@ class MusicLibrary:
                 return "", None
 
         # 是否需要代理
-        if self.config.web_music_proxy or url.startswith("self://"):
+        # 边下边播的音频流地址通常有防盗链，始终走代理
+        if (
+            self.config.web_music_proxy
+            or url.startswith("self://")
+            or name in self._stream_music
+        ):
             # 判断是否为电台，传入 radio 参数
             is_radio = self.is_web_radio_music(name)
             proxy_url = self._get_proxy_url(url, is_radio=is_radio)
@@ -1149,9 +1397,7 @@ class MusicLibrary:
         Returns:
             str: 最终重定向的URL
         """
-        import aiohttp
-
-        async with aiohttp.ClientSession() as session:
+        async with cookie_session() as session:
             async with session.get(proxy_url) as response:
                 # 获取最终重定向的 URL
                 return str(response.url)
@@ -8,11 +8,13 @@ import base64
 import ipaddress
 import json
 import socket
+from collections import deque
 from urllib.parse import urlparse
 
 import aiohttp
 
-from xiaomusic.const import PLAY_TYPE_ALL
+from xiaomusic.const import AUTO_ADD_SONG_LOOKAHEAD, PLAY_TYPE_ALL
+from xiaomusic.utils.http_client import cookie_session
 
 
 def _build_keyword(song_name, artist):
@@ -58,6 +60,10 @@ class OnlineMusicService:
         self.log = log
         self.js_plugin_manager = js_plugin_manager
         self.xiaomusic = xiaomusic_instance
+        # 自动添加歌曲的候选队列 {list_name: deque[music_item]}
+        self._auto_add_queues = {}
+        # 正在搜索候选歌曲的后台任务 {list_name: task}
+        self._auto_add_tasks = {}
 
     async def get_music_list_online(
         self, plugin="all", keyword="", page=1, limit=20, **kwargs
@@ -297,18 +303,72 @@ class OnlineMusicService:
             self.log.error(f"searchKey {search_key} get media source failed: {e}")
             return {"success": False, "error": str(e)}
 
-    # 调用在线搜索歌手，追加歌手歌曲
-    async def add_singer_song(self, list_name, name):
+    def prefill_singer_songs(self, list_name, singer_name):
+        """在后台搜索歌手的其他歌曲，放进歌单的候选队列
+
+        候选队列已满或已有搜索任务时不重复搜索
+
+        Args:
+            list_name: 网络歌单名称
+            singer_name: 歌手名称
+        """
+        queue = self._auto_add_queues.setdefault(list_name, deque())
+        if len(queue) >= AUTO_ADD_SONG_LOOKAHEAD:
+            return
+        task = self._auto_add_tasks.get(list_name)
+        if task and not task.done():
+            return
+        self._auto_add_tasks[list_name] = asyncio.create_task(
+            self._fill_singer_songs(list_name, singer_name)
+        )
+
+    def has_auto_add_song(self, list_name):
+        """歌单的候选队列里是否有歌曲"""
+        return bool(self._auto_add_queues.get(list_name))
+
+    def take_auto_add_song(self, list_name):
+        """从候选队列取出一首歌追加到歌单
+
+        Args:
+            list_name: 网络歌单名称
+
+        Returns:
+            str: 追加的歌曲名称，没有候选歌曲时返回空字符串
+        """
+        queue = self._auto_add_queues.get(list_name)
+        music_library = self.xiaomusic.music_library
+        while queue:
+            music_item = queue.popleft()
+            names = music_library.append_web_music(list_name, [music_item])
+            if names:
+                self.log.info(f"自动添加歌曲 {names[0]} 到歌单 {list_name}")
+                return names[0]
+        return ""
+
+    async def _fill_singer_songs(self, list_name, singer_name):
+        """搜索歌手的歌曲，去掉歌单里已有的和已在队列里的，补满候选队列"""
         try:
-            # 获取歌曲列表
-            result = await self.get_music_list_online(keyword=name, limit=10)
-            if result.get("success") and result.get("total") > 0:
-                self._handle_music_list(result.get("data"), list_name, True)
-            else:
-                return {"success": False, "error": "未找到歌曲"}
+            result = await self.get_music_list_online(keyword=singer_name, limit=10)
         except Exception as e:
-            # 记录错误日志
-            return {"success": False, "error": str(e)}
+            self.log.error(f"自动添加歌曲搜索 {singer_name} 失败: {e}")
+            return
+        if not (result.get("success") and result.get("total")):
+            self.log.info(f"自动添加歌曲没有搜到 {singer_name} 的歌曲")
+            return
+
+        song_list = self._deduplicate_song_list(result.get("data"))
+        music_items = self._convert_song_list_to_music_items(song_list)
+        queue = self._auto_add_queues.setdefault(list_name, deque())
+        skip_names = set(self.xiaomusic.music_library.music_list.get(list_name, []))
+        skip_names.update(item["name"] for item in queue)
+        for music_item in music_items:
+            if len(queue) >= AUTO_ADD_SONG_LOOKAHEAD:
+                break
+            if music_item["name"] in skip_names:
+                continue
+            skip_names.add(music_item["name"])
+            queue.append(music_item)
+        self.log.info(f"歌单 {list_name} 自动添加候选歌曲 {len(queue)} 首")
 
     """------------------------私有--------------------------"""
 
@@ -628,7 +688,10 @@ class OnlineMusicService:
             dict: 搜索结果
         """
         try:
-            results = self.js_plugin_manager.search(plugin, keyword, page, limit)
+            # 插件搜索是同步等待 Node.js 子进程的，放到线程里避免阻塞其他设备
+            results = await asyncio.to_thread(
+                self.js_plugin_manager.search, plugin, keyword, page, limit
+            )
 
             # 额外检查 resources 字段
             data_list = results.get("data", [])
@@ -652,7 +715,9 @@ class OnlineMusicService:
     async def _search_plugin_task(self, plugin_name, keyword, page, limit):
         """单个插件搜索任务"""
         try:
-            return self.js_plugin_manager.search(plugin_name, keyword, page, limit)
+            return await asyncio.to_thread(
+                self.js_plugin_manager.search, plugin_name, keyword, page, limit
+            )
         except Exception as e:
             # 直接抛出异常，让 asyncio.gather 处理
             raise e
@@ -910,9 +975,8 @@ class OnlineMusicService:
             if not _is_safe_hostname(parsed_url):
                 return url  # 返回原始URL
 
-            # 创建aiohttp客户端会话
-            async with aiohttp.ClientSession() as session:
-                # 发送HEAD请求跟随重定向
+            # 使用共享连接池发送HEAD请求跟随重定向，重定向中设置的 cookie 带到下一跳
+            async with cookie_session() as session:
                 async with session.head(
                     url,
                     allow_redirects=True,
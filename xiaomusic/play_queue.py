@@ -0,0 +1,145 @@
+"""播放队列模块
+
+同一个歌单排序后的列表在所有设备间共享，设备只保存随机种子和少量追加的歌曲。
+随机播放用基于种子的置换按需计算第 i 首是哪首歌，不需要复制和打乱整个列表。
+"""
+
+import random
+
+from xiaomusic.utils.text_utils import custom_sort_key
+
+_MASK64 = (1 << 64) - 1
+
+
+class SortedMusicList:
+    """排序后的歌单，只读，多个设备共享
+
+    Attributes:
+        source: 排序前的原始歌单列表，用来判断歌单是否已经变化
+        names: 排序后的歌曲名称
+        positions: 歌曲名称到排序后位置的映射，重复的歌曲取第一次出现的位置
+    """
+
+    def __init__(self, source: list):
+        self.source = source
+        self.names = tuple(sorted(source, key=custom_sort_key))
+        self.positions = {}
+        for i, name in enumerate(self.names):
+            self.positions.setdefault(name, i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def is_stale(self, source: list) -> bool:
+        """歌单列表是否已经不是生成时的那个"""
+        return source is not self.source or len(source) != len(self.names)
+
+
+class ShufflePermutation:
+    """[0, n) 上由种子决定的随机置换
+
+    用 4 轮 Feistel 网络在 2 的偶数次幂的范围内构造置换，超出 n 的结果继续迭代
+    （cycle walking）直到落回 [0, n)。正向和反向都只需要 O(1) 的内存。
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, n: int, seed: int):
+        self.n = n
+        self.seed = seed & _MASK64
+        half_bits = max((max(n - 1, 1).bit_length() + 1) // 2, 1)
+        self._half_bits = half_bits
+        self._half_mask = (1 << half_bits) - 1
+
+    def _round(self, value: int, round_index: int) -> int:
+        x = (value + self.seed + round_index * 0x9E3779B97F4A7C15) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return (x ^ (x >> 31)) & self._half_mask
+
+    def _encrypt(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._half_mask
+        for r in range(self.ROUNDS):
+            left, right = right, left ^ self._round(right, r)
+        return (left << self._half_bits) | right
+
+    def _decrypt(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._half_mask
+        for r in reversed(range(self.ROUNDS)):
+            left, right = right ^ self._round(left, r), left
+        return (left << self._half_bits) | right
+
+    def forward(self, i: int) -> int:
+        """第 i 个位置对应的原始下标"""
+        x = self._encrypt(i)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def inverse(self, j: int) -> int:
+        """原始下标 j 在置换后的位置"""
+        x = self._decrypt(j)
+        while x >= self.n:
+            x = self._decrypt(x)
+        return x
+
+
+class PlayQueue:
+    """设备的播放队列
+
+    基于共享的 SortedMusicList，按需给出顺序或随机顺序的歌曲，支持 len、下标、
+    切片、in、index 和 append 等常用的列表操作。追加的歌曲（比如刚下载的）
+    单独保存，排在歌单之后。
+    """
+
+    def __init__(self, base: SortedMusicList, shuffle: bool = False, seed=None):
+        self._base = base
+        self._perm = None
+        if shuffle and len(base) > 1:
+            if seed is None:
+                seed = random.getrandbits(64)
+            self._perm = ShufflePermutation(len(base), seed)
+        self._extra = []
+
+    @property
+    def shuffled(self) -> bool:
+        return self._perm is not None
+
+    def __len__(self):
+        return len(self._base) + len(self._extra)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("play queue index out of range")
+        base_len = len(self._base)
+        if index >= base_len:
+            return self._extra[index - base_len]
+        if self._perm:
+            index = self._perm.forward(index)
+        return self._base.names[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, name):
+        return name in self._base.positions or name in self._extra
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def index(self, name) -> int:
+        """歌曲在队列中的位置，不存在时抛出 ValueError"""
+        pos = self._base.positions.get(name)
+        if pos is not None:
+            return self._perm.inverse(pos) if self._perm else pos
+        return len(self._base) + self._extra.index(name)
+
+    def append(self, name):
+        """把歌曲追加到队列末尾"""
+        self._extra.append(name)
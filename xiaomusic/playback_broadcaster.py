@@ -0,0 +1,137 @@
+"""播放状态推送模块
+
+订阅播放状态变化事件，每次变化只序列化一次，再分发给订阅了该设备的所有
+WebSocket 连接。播放进度由客户端根据 offset 自行推算，服务端只按较低频率
+发送心跳校准。
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from xiaomusic.const import PLAYBACK_HEARTBEAT_SEC
+from xiaomusic.events import PLAYBACK_STATE_CHANGED
+
+log = logging.getLogger(__package__)
+
+
+class PlaybackSubscriber:
+    """一个连接的订阅
+
+    只保留每台设备最新的一条消息，连接发送慢时旧状态直接被新状态覆盖，
+    不会堆积。
+
+    Attributes:
+        did: 订阅的设备，空字符串表示订阅所有设备
+    """
+
+    def __init__(self, did: str):
+        self.did = did
+        self._pending = {}
+        self._event = asyncio.Event()
+
+    def put(self, did: str, message: str):
+        self._pending[did] = message
+        self._event.set()
+
+    async def get(self) -> list[str]:
+        """等待并取出所有待发送的消息"""
+        await self._event.wait()
+        self._event.clear()
+        messages = list(self._pending.values())
+        self._pending.clear()
+        return messages
+
+
+class PlaybackBroadcaster:
+    """播放状态广播器"""
+
+    def __init__(self, device_manager, event_bus, heartbeat_sec=PLAYBACK_HEARTBEAT_SEC):
+        """
+        Args:
+            device_manager: 设备管理器，用来读取设备的播放状态快照
+            event_bus: 事件总线
+            heartbeat_sec: 心跳间隔（秒），状态没有变化时也按这个间隔推送一次
+        """
+        self.device_manager = device_manager
+        self.heartbeat_sec = heartbeat_sec
+        # {did: set[PlaybackSubscriber]}，did 为空字符串的订阅接收所有设备的消息
+        self._subscribers = {}
+        self._heartbeat_task = None
+        event_bus.subscribe(PLAYBACK_STATE_CHANGED, self._on_state_changed)
+
+    def subscribe(self, did: str) -> PlaybackSubscriber:
+        """订阅设备的播放状态，订阅后立即收到一次当前状态"""
+        subscriber = PlaybackSubscriber(did)
+        self._subscribers.setdefault(did, set()).add(subscriber)
+        dids = [did] if did else list(self.device_manager.devices.keys())
+        for _did in dids:
+            message = self._serialize(_did)
+            if message is not None:
+                subscriber.put(_did, message)
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return subscriber
+
+    def unsubscribe(self, subscriber: PlaybackSubscriber):
+        subscribers = self._subscribers.get(subscriber.did)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[subscriber.did]
+        if not self._subscribers and self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _on_state_changed(self, did: str):
+        self._broadcast(did)
+
+    def _broadcast(self, did: str):
+        """把设备当前状态序列化一次，发给该设备和所有设备的订阅者"""
+        targets = [*self._subscribers.get(did, ()), *self._subscribers.get("", ())]
+        if not targets:
+            return
+        message = self._serialize(did)
+        if message is None:
+            return
+        for subscriber in targets:
+            subscriber.put(did, message)
+
+    def _serialize(self, did: str):
+        device = self.device_manager.devices.get(did)
+        if device is None:
+            return None
+        state = device.playback_state
+        now = time.time()
+        return json.dumps(
+            {
+                "ret": "OK",
+                "did": did,
+                "is_playing": state.is_playing,
+                "cur_music": state.cur_music,
+                "cur_playlist": state.cur_playlist,
+                "offset": state.get_offset(now),
+                "duration": state.duration,
+                "version": state.version,
+                "server_time": now,
+            }
+        )
+
+    async def _heartbeat(self):
+        """定期推送当前状态，校准客户端推算的播放进度"""
+        while True:
+            await asyncio.sleep(self.heartbeat_sec)
+            dids = set(self._subscribers.keys())
+            if "" in dids:
+                dids.discard("")
+                dids.update(self.device_manager.devices.keys())
+            for did in dids:
+                try:
+                    self._broadcast(did)
+                except Exception as e:
+                    log.exception(f"推送播放状态失败 did:{did} {e}")
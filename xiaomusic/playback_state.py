@@ -0,0 +1,66 @@
+"""播放状态模块
+
+每个设备维护一份带版本号的播放状态，在播放、停止、切换歌单等时机更新，
+查询接口直接读取快照，并用版本号生成 ETag。
+"""
+
+import hashlib
+import itertools
+import time
+from dataclasses import asdict, dataclass, field
+
+# 全局递增的版本号，设备重建后也不会和之前的版本号重复
+_versions = itertools.count(1)
+
+
+@dataclass
+class PlaybackState:
+    """设备的播放状态快照
+
+    offset 随时间变化，不算在状态里，由 start_time 和 paused_time 推算
+    """
+
+    did: str
+    is_playing: bool = False
+    cur_music: str = ""
+    cur_playlist: str = ""
+    play_type: int = 0
+    start_time: float = 0
+    paused_time: float = 0
+    duration: float = 0
+    version: int = field(default_factory=lambda: next(_versions))
+    updated_at: float = field(default_factory=time.time)
+
+    def update(self, **fields) -> bool:
+        """更新状态字段，有变化时递增版本号
+
+        Returns:
+            bool: 状态是否有变化
+        """
+        changed = False
+        for key, value in fields.items():
+            if getattr(self, key) != value:
+                setattr(self, key, value)
+                changed = True
+        if changed:
+            self.version = next(_versions)
+            self.updated_at = time.time()
+        return changed
+
+    def get_offset(self, now: float | None = None) -> float:
+        """当前播放位置（秒）"""
+        if not self.is_playing:
+            return 0
+        now = time.time() if now is None else now
+        return now - self.start_time - self.paused_time
+
+    def to_dict(self, now: float | None = None) -> dict:
+        data = asdict(self)
+        data["offset"] = self.get_offset(now)
+        return data
+
+
+def make_etag(states) -> str:
+    """根据一组播放状态的设备和版本号生成 ETag"""
+    key = ",".join(f"{state.did}:{state.version}" for state in states)
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
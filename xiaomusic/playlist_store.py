@@ -0,0 +1,172 @@
+"""歌单存储模块
+
+自定义歌单和网络歌单保存在 SQLite 数据库里，每个歌单一条记录，
+修改一个歌单只重写这一条记录，不再把所有歌单序列化成一个 JSON 字符串放在配置里。
+读取时使用内存缓存，歌单内容只在首次加载时解析一次。
+
+旧版本的 custom_play_list_json / music_list_json 格式通过 import_* / export_*
+方法导入导出。
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+
+log = logging.getLogger(__package__)
+
+# 自定义歌单 {名称: [歌曲名称]}
+CUSTOM_TABLE = "custom_play_list"
+# 网络歌单 {名称: [{"name", "url", "type", ...}]}
+WEB_TABLE = "web_music_list"
+
+
+class PlaylistStore:
+    """按歌单存储的歌单数据库
+
+    两张表结构相同：name 为歌单名称，seq 保持歌单的先后顺序，musics 为歌单内容的 JSON。
+    """
+
+    def __init__(self, filename: str):
+        """
+        Args:
+            filename: 数据库文件路径
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        with self._conn:
+            for table in (CUSTOM_TABLE, WEB_TABLE):
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "name TEXT PRIMARY KEY, seq INTEGER NOT NULL, musics TEXT NOT NULL)"
+                )
+        self._cache = {CUSTOM_TABLE: None, WEB_TABLE: None}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ==================== 通用操作 ====================
+
+    def _load(self, table) -> dict:
+        """读取整张表，返回 {歌单名称: 歌单内容}，按 seq 排序"""
+        cached = self._cache[table]
+        if cached is None:
+            cached = {}
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT name, musics FROM {table} ORDER BY seq"
+                ).fetchall()
+            for name, musics in rows:
+                try:
+                    cached[name] = json.loads(musics)
+                except json.JSONDecodeError as e:
+                    log.warning(f"歌单 {name} 内容解析失败: {e}")
+            self._cache[table] = cached
+        return cached
+
+    def _set(self, table, name, musics):
+        """新增或更新一个歌单，已存在的歌单保持原来的顺序"""
+        musics = list(musics)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO {table} (name, seq, musics) VALUES "
+                f"(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM {table}), ?) "
+                "ON CONFLICT(name) DO UPDATE SET musics = excluded.musics",
+                (name, json.dumps(musics, ensure_ascii=False)),
+            )
+        self._load(table)[name] = musics
+
+    def _delete(self, table, name):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+        self._load(table).pop(name, None)
+
+    def _rename(self, table, oldname, newname):
+        """重命名歌单，改名后的歌单排到最后，和旧版本的行为一致"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE {table} SET name = ?, "
+                f"seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM {table}) WHERE name = ?",
+                (newname, oldname),
+            )
+        # 重新加载以保持顺序
+        self._cache[table] = None
+
+    def _replace_all(self, table, lists: dict):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (name, seq, musics) VALUES (?, ?, ?)",
+                [
+                    (name, seq, json.dumps(list(musics), ensure_ascii=False))
+                    for seq, (name, musics) in enumerate(lists.items(), 1)
+                ],
+            )
+        self._cache[table] = {name: list(musics) for name, musics in lists.items()}
+
+    # ==================== 自定义歌单 ====================
+
+    def get_custom_play_lists(self) -> dict:
+        """所有自定义歌单 {名称: [歌曲名称]}，返回的是缓存，不要直接修改"""
+        return self._load(CUSTOM_TABLE)
+
+    def set_custom_play_list(self, name, musics):
+        self._set(CUSTOM_TABLE, name, musics)
+
+    def delete_custom_play_list(self, name):
+        self._delete(CUSTOM_TABLE, name)
+
+    def rename_custom_play_list(self, oldname, newname):
+        self._rename(CUSTOM_TABLE, oldname, newname)
+
+    def replace_custom_play_lists(self, lists: dict):
+        self._replace_all(CUSTOM_TABLE, lists)
+
+    def import_custom_play_list_json(self, content: str):
+        """导入 custom_play_list_json 格式的自定义歌单，替换现有的"""
+        lists = json.loads(content) if content else {}
+        if not isinstance(lists, dict):
+            raise ValueError("custom_play_list_json 应为 {歌单名称: [歌曲名称]}")
+        self.replace_custom_play_lists(lists)
+
+    def export_custom_play_list_json(self) -> str:
+        lists = self.get_custom_play_lists()
+        return json.dumps(lists, ensure_ascii=False) if lists else ""
+
+    # ==================== 网络歌单 ====================
+
+    def get_web_music_lists(self) -> dict:
+        """所有网络歌单 {名称: [歌曲]}，返回的是缓存，不要直接修改"""
+        return self._load(WEB_TABLE)
+
+    def set_web_music_list(self, name, musics):
+        self._set(WEB_TABLE, name, musics)
+
+    def import_music_list_json(self, content: str):
+        """导入 music_list_json 格式的网络歌单，替换现有的
+
+        格式为 [{"name": 歌单名称, "musics": [{"name", "url", "type"}]}]，
+        同名歌单以后出现的为准
+        """
+        items = json.loads(content) if content else []
+        if not isinstance(items, list):
+            raise ValueError("music_list_json 应为歌单列表")
+        lists = {}
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("music_list_json 中的歌单应为 {name, musics}")
+            name = item.get("name")
+            if name:
+                lists[name] = item.get("musics") or []
+        self._replace_all(WEB_TABLE, lists)
+
+    def export_music_list_json(self) -> str:
+        lists = self.get_web_music_lists()
+        if not lists:
+            return ""
+        return json.dumps(
+            [{"name": name, "musics": musics} for name, musics in lists.items()],
+            ensure_ascii=False,
+        )
@@ -0,0 +1,106 @@
+"""标签任务队列模块
+
+标签解析、时长获取、标签写入等任务统一在一个按优先级排序的队列中串行执行，
+正在播放、界面查看等交互请求可以插到后台批量构建任务的前面。
+"""
+
+import asyncio
+import inspect
+import itertools
+import logging
+
+# 任务优先级，数值越小越先执行
+PRIORITY_WRITE = 0  # 修改标签
+PRIORITY_PLAYING = 10  # 即将播放的歌曲
+PRIORITY_UI = 20  # 界面查看歌曲详情
+PRIORITY_PREFETCH = 30  # 预取下一首
+PRIORITY_BULK = 100  # 后台批量构建
+
+log = logging.getLogger(__package__)
+
+
+class TagJobQueue:
+    """按优先级串行执行标签任务的队列
+
+    同优先级的任务按提交顺序执行。工作协程在第一次提交任务时启动。
+    任务内部不能再向队列提交任务并等待，否则会死锁。
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+        self._seq = itertools.count()
+
+    async def submit(self, priority: int, func, *args):
+        """提交任务并等待执行结果
+
+        Args:
+            priority: 任务优先级
+            func: 任务函数，可以是普通函数或协程函数
+            *args: 任务参数
+
+        Returns:
+            任务函数的返回值，任务异常会原样抛出
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((priority, next(self._seq), func, args, future))
+        return await future
+
+    @property
+    def pending(self) -> int:
+        """排队中的任务数"""
+        return self._queue.qsize() if self._queue else 0
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+            self._worker.add_done_callback(self._on_worker_done)
+
+    def _on_worker_done(self, worker):
+        """工作协程意外退出时，如果还有排队的任务就重新启动，被取消时不重启"""
+        if worker is not self._worker or worker.cancelled():
+            return
+        log.error(f"标签任务工作协程退出: {worker.exception()!r}")
+        if not self._queue.empty():
+            self._ensure_worker()
+
+    @staticmethod
+    def _worker_cancelling() -> bool:
+        """工作协程本身是否正在被取消
+
+        Python 3.10 无法区分任务抛出的 CancelledError 和取消工作协程，按取消处理
+        """
+        cancelling = getattr(asyncio.current_task(), "cancelling", None)
+        return cancelling is None or cancelling() > 0
+
+    async def _run(self):
+        while True:
+            _, _, func, args, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                result = func(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+                if not future.done():
+                    future.set_result(result)
+            except BaseException as e:
+                # 任何异常都要让等待结果的提交方返回，否则会一直等下去
+                if not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                if isinstance(e, asyncio.CancelledError):
+                    if self._worker_cancelling():
+                        raise
+                    log.warning("标签任务被取消")
+                elif isinstance(e, Exception):
+                    log.exception(f"标签任务执行失败: {e}")
+                else:
+                    raise
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,162 @@
+"""定时器调度模块
+
+所有设备的定时器（下一首、预取、定时关机、TTS 等）统一放在一个最小堆里，
+由单个协程按到期时间依次触发，避免每个定时器各自创建一个 sleep 任务。
+到期时间使用单调时钟，系统时间被调整时不会提前或推迟触发。
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+
+log = logging.getLogger(__package__)
+
+# 堆中失效条目超过一半且堆大小超过该值时重建堆
+_COMPACT_MIN_SIZE = 64
+
+
+@dataclass(order=True)
+class _TimerEntry:
+    """堆中的定时器条目，按到期时间和创建顺序排序"""
+
+    when: float
+    seq: int
+    key: tuple = field(compare=False)
+    callback: object = field(compare=False)
+    args: tuple = field(compare=False, default=())
+    created_at: float = field(compare=False, default=0)
+
+
+class TimerScheduler:
+    """按 key 管理的定时器调度器
+
+    key 一般为 (did, 定时器名称)。同一个 key 同时只有一个待触发的定时器，
+    重复设置会覆盖之前的（重新计时）。回调是协程函数，到期后在独立任务中执行，
+    取消定时器只影响还未触发的定时器，不会打断正在执行的回调。
+    """
+
+    def __init__(self):
+        self._heap: list[_TimerEntry] = []
+        self._timers: dict[tuple, _TimerEntry] = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._runner = None
+        self._running_tasks = set()
+
+    def call_later(self, key: tuple, delay: float, callback, *args) -> None:
+        """设置（或重新设置）定时器
+
+        Args:
+            key: 定时器标识
+            delay: 延迟秒数
+            callback: 到期后执行的协程函数
+            *args: 回调参数
+        """
+        now = time.monotonic()
+        entry = _TimerEntry(
+            when=now + max(delay, 0),
+            seq=next(self._seq),
+            key=key,
+            callback=callback,
+            args=args,
+            created_at=now,
+        )
+        self._timers[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._maybe_compact()
+        self._ensure_runner()
+        self._wakeup.set()
+
+    def cancel(self, key: tuple) -> bool:
+        """取消定时器
+
+        Returns:
+            bool: 是否存在并取消了待触发的定时器
+        """
+        # 堆中的旧条目在弹出时会因为对不上 _timers 而被丢弃
+        cancelled = self._timers.pop(key, None) is not None
+        if cancelled:
+            self._maybe_compact()
+        return cancelled
+
+    def has(self, key: tuple) -> bool:
+        """是否有待触发的定时器"""
+        return key in self._timers
+
+    def remaining(self, key: tuple) -> float:
+        """定时器剩余秒数，不存在返回 -1"""
+        entry = self._timers.get(key)
+        if entry is None:
+            return -1
+        return max(entry.when - time.monotonic(), 0)
+
+    def snapshot(self) -> list[dict]:
+        """所有待触发定时器的状态，按到期时间排序"""
+        now = time.monotonic()
+        return [
+            {
+                "did": entry.key[0],
+                "name": entry.key[1],
+                "remaining": max(entry.when - now, 0),
+                "delay": entry.when - entry.created_at,
+                "callback": getattr(entry.callback, "__name__", str(entry.callback)),
+            }
+            for entry in sorted(self._timers.values())
+        ]
+
+    def _maybe_compact(self):
+        """失效条目超过堆的一半时重建堆
+
+        取消和重新设置的定时器只从 _timers 中移除，旧条目要等到达堆顶才会被丢弃，
+        频繁重设时堆会一直变大
+        """
+        if len(self._heap) < _COMPACT_MIN_SIZE:
+            return
+        if len(self._heap) - len(self._timers) > len(self._heap) // 2:
+            self._heap = list(self._timers.values())
+            heapq.heapify(self._heap)
+
+    def _ensure_runner(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    def _pop_due(self, now: float) -> list[_TimerEntry]:
+        """弹出所有已到期且仍有效的定时器"""
+        due = []
+        while self._heap and self._heap[0].when <= now:
+            entry = heapq.heappop(self._heap)
+            if self._timers.get(entry.key) is entry:
+                del self._timers[entry.key]
+                due.append(entry)
+        # 丢弃堆顶已失效的条目，避免无效唤醒
+        while self._heap and self._timers.get(self._heap[0].key) is not self._heap[0]:
+            heapq.heappop(self._heap)
+        return due
+
+    async def _run(self):
+        while True:
+            for entry in self._pop_due(time.monotonic()):
+                task = asyncio.create_task(self._fire(entry))
+                self._running_tasks.add(task)
+                task.add_done_callback(self._running_tasks.discard)
+
+            self._wakeup.clear()
+            timeout = self._heap[0].when - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    async def _fire(entry: _TimerEntry):
+        try:
+            await entry.callback(*entry.args)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            log.exception(f"定时器 {entry.key} 执行异常: {e}")
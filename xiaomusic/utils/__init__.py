@@ -7,5 +7,6 @@
 - file_utils: 文件和目录操作
 - music_utils: 音乐文件处理
 - network_utils: 网络请求和下载
+- http_client: 共享 HTTP 会话和连接池统计
 - system_utils: 系统操作和环境
 """
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 """文件和目录操作相关工具函数"""
 
+import json
 import logging
 import os
 import re
 import shutil
+import tempfile
 
 log = logging.getLogger(__package__)
 
@@ -168,6 +170,38 @@ def not_in_dirs(filename: str, ignore_absolute_dirs: list) -> bool:
     return True  # 文件不在排除目录中
 
 
+def atomic_write_json(filename: str, data, **kwargs) -> None:
+    """原子地写入 JSON 文件
+
+    先写到同目录下的临时文件，再替换目标文件，写入中途出错或进程退出时
+    原文件保持完整。
+
+    Args:
+        filename: 目标文件路径
+        data: 要写入的数据
+        **kwargs: 传给 json.dump 的参数
+    """
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=dirname
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有属主可读写，沿用原文件的权限
+        mode = os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def chmodfile(file_path: str) -> None:
     """修改文件权限为 775"""
     try:
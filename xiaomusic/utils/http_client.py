@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""共享 HTTP 客户端
+
+所有云端请求共用一个连接池，复用 DNS 缓存和 keep-alive 连接，
+避免每次请求都重新建立 TCP/TLS 连接，并统计连接复用情况。
+
+共享会话不保存 cookie，只用于按次传入账号 cookie 的小米接口；
+其他请求用 cookie_session() 在同一个连接池上创建带独立 cookie_jar 的会话，
+跟随重定向时源站设置的 cookie 会带到下一跳。
+"""
+
+import logging
+import time
+
+import aiohttp
+from yarl import URL
+
+log = logging.getLogger(__package__)
+
+
+class HttpClient:
+    """共享的 aiohttp 会话及连接池统计
+
+    会话在第一次使用时创建（需要在事件循环中），关闭后再次使用会重新创建。
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_ttl: int = 300,
+        keepalive_timeout: float = 60,
+    ):
+        """
+        Args:
+            limit: 连接池总连接数上限
+            limit_per_host: 每个主机的连接数上限
+            dns_ttl: DNS 缓存时间（秒）
+            keepalive_timeout: 空闲连接保持时间（秒）
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._created_at = 0
+        self._stats = self._empty_stats()
+        self._trace_config = self._create_trace_config()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {
+            "requests": 0,
+            "in_flight": 0,
+            "errors": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "queued": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话，不要在 async with 中使用，也不要自行关闭"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            # 不保存响应里的 cookie，需要 cookie 的请求按次传入，避免不同用途的请求互相影响
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._trace_config],
+            )
+            self._created_at = time.time()
+            log.info(
+                f"创建共享 HTTP 会话 limit:{self.limit} limit_per_host:{self.limit_per_host}"
+            )
+        return self._session
+
+    def cookie_session(self) -> aiohttp.ClientSession:
+        """在共享连接池上创建带独立 cookie_jar 的会话
+
+        用 async with 管理，关闭时只关闭会话本身，不影响共享连接池
+        """
+        shared = self.get_session()
+        return aiohttp.ClientSession(
+            connector=shared.connector,
+            connector_owner=False,
+            trace_configs=[self._trace_config],
+        )
+
+    async def close(self):
+        """关闭共享会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> dict:
+        """连接池统计
+
+        Returns:
+            dict: 请求数、新建/复用连接数、排队次数、DNS 缓存命中等
+        """
+        stats = dict(self._stats)
+        total = stats["new_connections"] + stats["reused_connections"]
+        stats["reuse_ratio"] = stats["reused_connections"] / total if total else 0
+        stats["limit"] = self.limit
+        stats["limit_per_host"] = self.limit_per_host
+        stats["session_open"] = self._session is not None and not self._session.closed
+        stats["session_age"] = (
+            time.time() - self._created_at if stats["session_open"] else 0
+        )
+        return stats
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        stats = self._stats
+
+        def counter(*keys, decrease=()):
+            async def on_event(session, trace_config_ctx, params):
+                for key in keys:
+                    stats[key] += 1
+                for key in decrease:
+                    stats[key] -= 1
+
+            return on_event
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(counter("requests", "in_flight"))
+        trace_config.on_request_end.append(counter(decrease=("in_flight",)))
+        trace_config.on_request_exception.append(
+            counter("errors", decrease=("in_flight",))
+        )
+        trace_config.on_connection_create_end.append(counter("new_connections"))
+        trace_config.on_connection_reuseconn.append(counter("reused_connections"))
+        trace_config.on_connection_queued_start.append(counter("queued"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+
+# 进程内共享的 HTTP 客户端
+http_client = HttpClient()
+
+
+def get_session() -> aiohttp.ClientSession:
+    """获取进程内共享的 aiohttp 会话"""
+    return http_client.get_session()
+
+
+def cookie_session() -> aiohttp.ClientSession:
+    """在进程内共享的连接池上创建带独立 cookie_jar 的会话"""
+    return http_client.cookie_session()
+
+
+async def close_session():
+    """关闭进程内共享的 aiohttp 会话"""
+    await http_client.close()
+
+
+def cookies_for_url(cookie_jar, url: str) -> dict:
+    """从 cookie_jar 中取出发往 url 的 cookie
+
+    共享会话不能替换 cookie_jar，需要带账号 cookie 的请求按次传入
+
+    Args:
+        cookie_jar: aiohttp CookieJar，可以为 None
+        url: 请求地址
+
+    Returns:
+        dict: {name: value}
+    """
+    if cookie_jar is None:
+        return {}
+    return {
+        name: morsel.value
+        for name, morsel in cookie_jar.filter_cookies(URL(url)).items()
+    }
@@ -44,6 +44,7 @@ from mutagen.wavpack import WavPack
 from PIL import Image
 
 from xiaomusic.const import SUPPORT_MUSIC_TYPE
+from xiaomusic.utils.http_client import cookie_session
 
 log = logging.getLogger(__package__)
 
@@ -84,6 +85,339 @@ def is_m4a(url: str) -> bool:
     return url.endswith(".m4a")
 
 
+# 网络音乐探测时长时，每次 Range 请求读取的字节数
+WEB_PROBE_CHUNK_SIZE = 64 * 1024
+# 单首网络音乐探测时长最多发起的 Range 请求次数
+WEB_PROBE_MAX_REQUESTS = 6
+
+# MP3 比特率表(kbps)，key 为 (是否 MPEG1, layer)
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# MP3 采样率表，key 为版本位 (3: MPEG1, 2: MPEG2, 0: MPEG2.5)
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+class _RangeReader:
+    """通过 HTTP Range 按需读取远程文件片段"""
+
+    def __init__(self, session, url: str, headers: dict = None):
+        self.session = session
+        self.url = url
+        self.headers = headers or {}
+        self.file_size = 0  # 文件总大小，未知为 0
+        self.support_range = True
+        self.request_count = 0
+        self._head = b""  # 文件开头的缓存
+
+    async def read(self, start: int, size: int = WEB_PROBE_CHUNK_SIZE) -> bytes:
+        """读取 [start, start + size) 范围的数据，失败或超出范围返回空"""
+        end = start + size
+        if end <= len(self._head):
+            return self._head[start:end]
+        if self.file_size and start >= self.file_size:
+            return b""
+        if not self.support_range and start > 0:
+            # 服务端不支持 Range，无法只读取中间片段
+            return b""
+        if self.request_count >= WEB_PROBE_MAX_REQUESTS:
+            return b""
+
+        self.request_count += 1
+        headers = dict(self.headers)
+        headers["Range"] = f"bytes={start}-{end - 1}"
+        async with self.session.get(
+            self.url,
+            headers=headers,
+            allow_redirects=True,
+            timeout=aiohttp.ClientTimeout(total=15),
+        ) as response:
+            if response.status == 206:
+                content_range = response.headers.get("Content-Range", "")
+                total = content_range.rsplit("/", 1)[-1]
+                if total.isdigit():
+                    self.file_size = int(total)
+                data = await _read_at_most(response, size)
+            elif response.status == 200:
+                # 不支持 Range，只读取开头需要的部分，然后断开连接
+                self.support_range = False
+                self.file_size = response.content_length or 0
+                data = await _read_at_most(response, end)
+                self._head = data
+                data = data[start:end]
+            else:
+                log.info(f"Range request {self.url} status: {response.status}")
+                return b""
+
+        if start == 0:
+            self._head = data
+        return data
+
+
+async def _read_at_most(response, size: int) -> bytes:
+    """从响应中最多读取 size 字节"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = await response.content.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def _get_id3v2_size(data: bytes) -> int:
+    """获取 ID3v2 标签长度（包含头部），没有标签返回 0"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    size += 10
+    # 有 footer
+    if data[5] & 0x10:
+        size += 10
+    return size
+
+
+def _parse_mp3_frame_header(data: bytes, pos: int):
+    """解析 MP3 帧头
+
+    Returns:
+        (是否 MPEG1, layer, 比特率(kbps), 采样率, 是否单声道, 帧长度)，无效返回 None
+    """
+    if pos + 4 > len(data):
+        return None
+    header = int.from_bytes(data[pos : pos + 4], "big")
+    if (header >> 21) & 0x7FF != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    sample_rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer_bits == 0:
+        return None
+    if bitrate_index in (0, 0xF) or sample_rate_index == 3:
+        return None
+
+    is_mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(is_mpeg1, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (header >> 9) & 0x1
+    is_mono = ((header >> 6) & 0x3) == 3
+
+    if layer == 1:
+        frame_len = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    elif layer == 3 and not is_mpeg1:
+        frame_len = 72 * bitrate * 1000 // sample_rate + padding
+    else:
+        frame_len = 144 * bitrate * 1000 // sample_rate + padding
+    return is_mpeg1, layer, bitrate, sample_rate, is_mono, frame_len
+
+
+def _find_mp3_frame(data: bytes, start: int = 0):
+    """查找第一个有效的 MP3 帧，返回 (帧位置, 帧头信息)
+
+    WAV、OGG 等非 MP3 数据里也可能偶然出现帧同步字，紧跟着的下一帧也有效，
+    且版本、layer、采样率一致，才认为找到了
+    """
+    pos = data.find(b"\xff", start)
+    while pos != -1:
+        info = _parse_mp3_frame_header(data, pos)
+        if info:
+            next_info = _parse_mp3_frame_header(data, pos + info[5])
+            if next_info and next_info[:2] == info[:2] and next_info[3] == info[3]:
+                return pos, info
+        pos = data.find(b"\xff", pos + 1)
+    return -1, None
+
+
+def parse_mp3_duration(data: bytes, audio_offset: int, file_size: int) -> float:
+    """从 MP3 文件片段中解析时长
+
+    优先读取 Xing/Info/VBRI 头中的帧数，没有则按 CBR 用文件大小和比特率估算。
+    找不到连续两个有效帧时不是 MP3，返回 0
+
+    Args:
+        data: 从 audio_offset 开始的文件片段（已跳过 ID3v2 标签）
+        audio_offset: 片段在文件中的偏移
+        file_size: 文件总大小，未知为 0
+
+    Returns:
+        时长(秒)，失败返回 0
+    """
+    pos, info = _find_mp3_frame(data)
+    if info is None:
+        return 0
+    is_mpeg1, layer, bitrate, sample_rate, is_mono, _ = info
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and not is_mpeg1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+
+    # Xing/Info 头位于 side info 之后
+    if is_mpeg1:
+        side_info_len = 17 if is_mono else 32
+    else:
+        side_info_len = 9 if is_mono else 17
+    xing_pos = pos + 4 + side_info_len
+    if data[xing_pos : xing_pos + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing_pos + 4 : xing_pos + 8], "big")
+        if flags & 0x1:
+            frames = int.from_bytes(data[xing_pos + 8 : xing_pos + 12], "big")
+            if frames > 0:
+                return frames * samples_per_frame / sample_rate
+
+    # VBRI 头固定位于帧头后 32 字节
+    vbri_pos = pos + 4 + 32
+    if data[vbri_pos : vbri_pos + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri_pos + 14 : vbri_pos + 18], "big")
+        if frames > 0:
+            return frames * samples_per_frame / sample_rate
+
+    # CBR：用文件大小和比特率估算
+    if file_size > audio_offset + pos and bitrate > 0:
+        return (file_size - audio_offset - pos) * 8 / (bitrate * 1000)
+    return 0
+
+
+def parse_flac_duration(data: bytes) -> float:
+    """从 FLAC 文件开头的 STREAMINFO 块中解析时长"""
+    if len(data) < 26 or data[:4] != b"fLaC":
+        return 0
+    # 第一个元数据块必须是 STREAMINFO
+    if data[4] & 0x7F != 0:
+        return 0
+    value = int.from_bytes(data[18:26], "big")
+    sample_rate = value >> 44
+    total_samples = value & ((1 << 36) - 1)
+    if sample_rate <= 0:
+        return 0
+    return total_samples / sample_rate
+
+
+def _parse_mp4_atom_header(data: bytes, pos: int):
+    """解析 MP4 atom 头，返回 (atom 大小, 类型, 头长度)，无效返回 None"""
+    if pos + 8 > len(data):
+        return None
+    size = int.from_bytes(data[pos : pos + 4], "big")
+    atom_type = data[pos + 4 : pos + 8]
+    header_len = 8
+    if size == 1:
+        if pos + 16 > len(data):
+            return None
+        size = int.from_bytes(data[pos + 8 : pos + 16], "big")
+        header_len = 16
+    return size, atom_type, header_len
+
+
+def parse_mp4_moov_duration(moov: bytes) -> float:
+    """从 MP4 moov atom 数据中解析 mvhd 里的时长
+
+    Args:
+        moov: 完整的 moov atom 数据（包含 atom 头）
+    """
+    atom = _parse_mp4_atom_header(moov, 0)
+    if not atom or atom[1] != b"moov":
+        return 0
+    pos = atom[2]
+    while pos < len(moov):
+        child = _parse_mp4_atom_header(moov, pos)
+        if not child or child[0] < 8:
+            return 0
+        size, atom_type, header_len = child
+        if atom_type == b"mvhd":
+            body = moov[pos + header_len : pos + size]
+            if len(body) < 32:
+                return 0
+            if body[0] == 1:
+                timescale = int.from_bytes(body[20:24], "big")
+                duration = int.from_bytes(body[24:32], "big")
+            else:
+                timescale = int.from_bytes(body[12:16], "big")
+                duration = int.from_bytes(body[16:20], "big")
+            if timescale <= 0:
+                return 0
+            return duration / timescale
+        pos += size
+    return 0
+
+
+async def _probe_mp4_duration(reader: _RangeReader, head: bytes) -> float:
+    """遍历 MP4 顶层 atom 找到 moov（可能位于文件末尾）并解析时长"""
+    pos = 0
+    data = head
+    data_offset = 0
+    while True:
+        atom = _parse_mp4_atom_header(data, pos - data_offset)
+        if atom is None:
+            # 当前片段不够解析 atom 头，从 atom 起点重新读取
+            data = await reader.read(pos)
+            data_offset = pos
+            atom = _parse_mp4_atom_header(data, 0)
+            if atom is None:
+                return 0
+        size, atom_type, _ = atom
+        if size == 0:
+            # atom 延伸到文件末尾
+            if atom_type != b"moov" or not reader.file_size:
+                return 0
+            size = reader.file_size - pos
+        if size < 8:
+            return 0
+
+        if atom_type == b"moov":
+            start = pos - data_offset
+            moov = data[start : start + size]
+            if len(moov) < size:
+                moov = await reader.read(pos, size)
+            return parse_mp4_moov_duration(moov)
+        pos += size
+
+
+async def _probe_web_music_duration(session, url: str) -> float:
+    """只读取文件头（必要时读取文件尾部）解析网络音乐时长
+
+    支持 MP3（Xing/VBRI 头或 CBR 估算）、FLAC（STREAMINFO）、MP4/M4A（moov/mvhd），
+    其他格式返回 0，由调用方下载完整文件获取时长
+
+    Args:
+        session: aiohttp.ClientSession 实例
+        url: 音乐文件的 URL 地址
+
+    Returns:
+        时长(秒)，无法从头部解析则返回 0
+    """
+    reader = _RangeReader(session, url)
+    head = await reader.read(0)
+    if not head:
+        return 0
+
+    if head[4:8] == b"ftyp":
+        return await _probe_mp4_duration(reader, head)
+
+    # 跳过 ID3v2 标签（内嵌封面时可能很大）
+    audio_offset = _get_id3v2_size(head)
+    data = head[audio_offset:]
+    if audio_offset and len(data) < WEB_PROBE_CHUNK_SIZE // 2:
+        data = await reader.read(audio_offset)
+
+    if data[:4] == b"fLaC":
+        return parse_flac_duration(data)
+    return parse_mp3_duration(data, audio_offset, reader.file_size)
+
+
 async def _get_web_music_duration(session, url: str, config) -> float:
     """
     异步获取网络音乐文件的完整内容并获取其时长
@@ -134,12 +468,13 @@ async def get_web_music_duration(url: str, config) -> tuple[float, str]:
     """
     duration = 0
     try:
-        parsed_url = urlparse(url)
-        file_path = parsed_url.path
-        _, extension = os.path.splitext(file_path)
-        if extension.lower() not in SUPPORT_MUSIC_TYPE:
-            cleaned_url = parsed_url.geturl()
-            async with aiohttp.ClientSession() as session:
+        # 共享连接池，cookie 只在本次获取时长的请求之间传递（重定向、分段读取）
+        async with cookie_session() as session:
+            parsed_url = urlparse(url)
+            file_path = parsed_url.path
+            _, extension = os.path.splitext(file_path)
+            if extension.lower() not in SUPPORT_MUSIC_TYPE:
+                cleaned_url = parsed_url.geturl()
                 async with session.get(
                     cleaned_url,
                     allow_redirects=True,
@@ -148,15 +483,28 @@ async def get_web_music_duration(url: str, config) -> tuple[float, str]:
                     },
                 ) as response:
                     url = str(response.url)
-        # 设置总超时时间为60秒
-        timeout = aiohttp.ClientTimeout(total=60)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            duration = await _get_web_music_duration(session, url, config)
+            # 会话没有整体超时，这里限制总超时时间为60秒
+            duration = await asyncio.wait_for(
+                _fetch_web_music_duration(session, url, config), timeout=60
+            )
     except Exception as e:
         log.error(f"Error get_web_music_duration: {e}")
     return duration, url
 
 
+async def _fetch_web_music_duration(session, url: str, config) -> float:
+    # 优先只读取文件头解析时长，失败再完整下载
+    duration = 0
+    try:
+        duration = await _probe_web_music_duration(session, url)
+    except Exception as e:
+        log.warning(f"Error _probe_web_music_duration: {e}")
+    if duration <= 0:
+        log.info(f"无法从文件头获取时长，完整下载获取 url:{url}")
+        duration = await _get_web_music_duration(session, url, config)
+    return duration
+
+
 async def get_local_music_duration(filename: str, config) -> float:
     """
     获取本地音乐文件播放时长
@@ -170,20 +518,55 @@ async def get_local_music_duration(filename: str, config) -> float:
     """
     duration = 0
     if config.get_duration_type == "ffprobe":
-        duration = get_duration_by_ffprobe(filename, config.ffmpeg_location)
+        duration = await get_duration_by_ffprobe(filename, config.ffmpeg_location)
     else:
         duration = await get_duration_by_mutagen(filename)
 
     # 换个方式重试一次
     if duration == 0:
         if config.get_duration_type != "ffprobe":
-            duration = get_duration_by_ffprobe(filename, config.ffmpeg_location)
+            duration = await get_duration_by_ffprobe(filename, config.ffmpeg_location)
         else:
             duration = await get_duration_by_mutagen(filename)
 
     return duration
 
 
+async def get_local_music_durations(filenames: list, config) -> dict:
+    """
+    批量获取本地音乐文件播放时长
+
+    ffprobe 调用统一走共享的进程池，并发数受限，不会阻塞事件循环。
+
+    Args:
+        filenames: 文件路径列表
+        config: 配置对象
+
+    Returns:
+        {文件路径: 时长(秒)}，获取失败的时长为 0
+    """
+    if config.get_duration_type == "ffprobe":
+        durations = await get_durations_by_ffprobe(filenames, config.ffmpeg_location)
+    else:
+        results = await asyncio.gather(
+            *[get_duration_by_mutagen(filename) for filename in filenames]
+        )
+        durations = dict(zip(filenames, results, strict=True))
+
+    # 换个方式重试一次
+    retry_files = [filename for filename, d in durations.items() if d == 0]
+    if retry_files:
+        if config.get_duration_type != "ffprobe":
+            durations.update(
+                await get_durations_by_ffprobe(retry_files, config.ffmpeg_location)
+            )
+        else:
+            for filename in retry_files:
+                durations[filename] = await get_duration_by_mutagen(filename)
+
+    return durations
+
+
 async def get_duration_by_mutagen(file_path: str) -> float:
     """使用 mutagen 获取音乐时长"""
     duration = 0
@@ -199,10 +582,38 @@ async def get_duration_by_mutagen(file_path: str) -> float:
     return duration
 
 
-def get_duration_by_ffprobe(file_path: str, ffmpeg_location: str) -> float:
-    """使用 ffprobe 获取音乐时长"""
-    duration = 0
-    try:
+class FFprobePool:
+    """共享的 ffprobe 进程池
+
+    用 asyncio 子进程执行 ffprobe，信号量限制同时运行的进程数，
+    超时的进程会被杀掉，避免拖住其他设备的播放和标签生成。
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 30):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def probe_duration(self, file_path: str, ffmpeg_location: str) -> float:
+        """获取单个文件时长，失败返回 0"""
+        async with self._semaphore:
+            return await self._run(file_path, ffmpeg_location)
+
+    async def probe_durations(
+        self, file_paths: list, ffmpeg_location: str
+    ) -> dict[str, float]:
+        """批量获取文件时长，所有文件共享同一个进程池
+
+        Returns:
+            {文件路径: 时长(秒)}
+        """
+        results = await asyncio.gather(
+            *[self.probe_duration(path, ffmpeg_location) for path in file_paths]
+        )
+        return dict(zip(file_paths, results, strict=True))
+
+    async def _run(self, file_path: str, ffmpeg_location: str) -> float:
+        duration = 0
         # 构造 ffprobe 命令参数
         cmd_args = [
             os.path.join(ffmpeg_location, "ffprobe"),
@@ -214,36 +625,51 @@ def get_duration_by_ffprobe(file_path: str, ffmpeg_location: str) -> float:
             "json",  # 以 JSON 格式输出
             file_path,
         ]
+        log.debug(f"待执行的完整命令 ffprobe command: {' '.join(cmd_args)}")
+
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd_args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            stdout, _ = await asyncio.wait_for(proc.communicate(), self.timeout)
+            output = stdout.decode("utf-8", errors="ignore")
+            log.debug(
+                f"命令执行结果 command result - return code: {proc.returncode}, stdout: {output}"
+            )
 
-        # 输出待执行的完整命令
-        full_command = " ".join(cmd_args)
-        log.info(f"待执行的完整命令 ffprobe command: {full_command}")
+            # 解析 JSON 输出，获取时长
+            ffprobe_output = json.loads(output)
+            duration = float(ffprobe_output["format"]["duration"])
+            log.info(
+                f"Successfully extracted duration: {duration} seconds for file: {file_path}"
+            )
+        except asyncio.TimeoutError:
+            log.warning(f"ffprobe 获取 {file_path} 时长超时({self.timeout}秒)")
+        except Exception as e:
+            log.warning(f"Error getting local music {file_path} duration: {e}")
+        finally:
+            if proc and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        return duration
 
-        # 使用 ffprobe 获取文件的元数据，并以 JSON 格式输出
-        result = subprocess.run(
-            cmd_args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
 
-        # 输出命令执行结果
-        log.info(
-            f"命令执行结果 command result - return code: {result.returncode}, stdout: {result.stdout}"
-        )
+_ffprobe_pool = FFprobePool()
 
-        # 解析 JSON 输出
-        ffprobe_output = json.loads(result.stdout)
 
-        # 获取时长
-        duration = float(ffprobe_output["format"]["duration"])
-        log.info(
-            f"Successfully extracted duration: {duration} seconds for file: {file_path}"
-        )
+async def get_duration_by_ffprobe(file_path: str, ffmpeg_location: str) -> float:
+    """使用 ffprobe 获取音乐时长"""
+    return await _ffprobe_pool.probe_duration(file_path, ffmpeg_location)
 
-    except Exception as e:
-        log.warning(f"Error getting local music {file_path} duration: {e}")
-    return duration
+
+async def get_durations_by_ffprobe(
+    file_paths: list, ffmpeg_location: str
+) -> dict[str, float]:
+    """使用 ffprobe 批量获取音乐时长"""
+    return await _ffprobe_pool.probe_durations(file_paths, ffmpeg_location)
 
 
 def no_padding(info) -> int:
@@ -486,6 +912,21 @@ def extract_audio_metadata(file_path: str, save_root: str) -> dict:
     Returns:
         元数据字典
     """
+    metadata, _ = extract_audio_info(file_path, save_root)
+    return metadata
+
+
+def extract_audio_info(file_path: str, save_root: str) -> tuple[dict, float]:
+    """
+    一次解析同时提取音频文件的元数据、封面和时长
+
+    Args:
+        file_path: 音频文件路径
+        save_root: 图片保存根目录
+
+    Returns:
+        (元数据字典, 时长(秒))，无法解析时时长为 0
+    """
     metadata = Metadata()
 
     audio = None
@@ -495,11 +936,23 @@ def extract_audio_metadata(file_path: str, save_root: str) -> dict:
         log.warning(f"Error extract_audio_metadata file: {file_path} {e}")
 
     if audio is None:
-        return asdict(metadata)
+        return asdict(metadata), 0
+
+    duration = 0
+    try:
+        duration = audio.info.length
+    except Exception as e:
+        log.warning(f"Error getting local music {file_path} duration: {e}")
 
     tags = audio.tags
-    if tags is None:
-        return asdict(metadata)
+    if tags is not None:
+        _fill_metadata_from_tags(audio, tags, metadata, file_path, save_root)
+
+    return asdict(metadata), duration
+
+
+def _fill_metadata_from_tags(audio, tags, metadata, file_path: str, save_root: str):
+    """按文件格式从标签中读取元数据，封面保存到 save_root"""
 
     if isinstance(audio, MP3):
         metadata.title = _get_tag_value(tags, "TIT2")
@@ -573,8 +1026,6 @@ def extract_audio_metadata(file_path: str, save_root: str) -> dict:
         metadata.title = _get_tag_value(tags, "Title")
         metadata.artist = _get_tag_value(tags, "Artist")
 
-    return asdict(metadata)
-
 
 def _set_mp3_tags(audio, info: Metadata) -> None:
     """设置 MP3 标签"""
@@ -3,6 +3,7 @@
 
 import asyncio
 import hashlib
+import json
 import logging
 import os
 import time
@@ -17,6 +18,10 @@ from urllib.parse import (
 import aiohttp
 import edge_tts
 
+from xiaomusic.const import CACHE_SAVE_DELAY_SEC
+from xiaomusic.utils.file_utils import atomic_write_json
+from xiaomusic.utils.http_client import cookie_session
+
 log = logging.getLogger(__package__)
 
 
@@ -44,10 +49,10 @@ async def downloadfile(url: str) -> str:
     # 构建目标URL
     cleaned_url = parsed_url.geturl()
 
-    # 使用 aiohttp 创建一个客户端会话来发起请求
-    async with aiohttp.ClientSession() as session:
+    # 使用共享连接池发起请求
+    async with cookie_session() as session:
         async with session.get(
-            cleaned_url, timeout=5
+            cleaned_url, timeout=aiohttp.ClientTimeout(total=5)
         ) as response:  # 增加超时以避免长时间挂起
             # 如果响应不是200，引发异常
             response.raise_for_status()
@@ -244,6 +249,81 @@ async def download_one_music(
     return download_proc
 
 
+async def get_stream_url(
+    config, search_key: str, timeout: float = 30
+) -> tuple[str, float]:
+    """
+    通过 yt-dlp 获取歌曲的音频流地址和时长，不下载文件
+
+    时长取自 yt-dlp 解析出的元数据，不需要再去探测临时的音频流地址
+
+    Args:
+        config: 配置对象
+        search_key: 搜索关键词（会加上 config.search_prefix）
+        timeout: 超时时间（秒）
+
+    Returns:
+        (音频流地址, 时长秒数)，失败返回 ("", 0)，元数据里没有时长时为 0
+    """
+    sbp_args = (
+        "yt-dlp",
+        f"{config.search_prefix}{search_key}",
+        "-f",
+        "bestaudio",
+        "--print",
+        "duration",
+        "--print",
+        "urls",
+        "--no-playlist",
+    )
+
+    if config.proxy:
+        sbp_args += ("--proxy", f"{config.proxy}")
+
+    if config.enable_yt_dlp_cookies:
+        sbp_args += ("--cookies", f"{config.yt_dlp_cookies_path}")
+
+    log.info(f"get_stream_url: {' '.join(sbp_args)}")
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *sbp_args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError as e:
+        log.warning(f"get_stream_url 启动 yt-dlp 失败: {e}")
+        return "", 0
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        log.warning(f"get_stream_url 超时: {search_key}")
+        return "", 0
+
+    if proc.returncode != 0:
+        log.warning(
+            f"get_stream_url 失败 returncode:{proc.returncode} {stderr.decode(errors='ignore').strip()}"
+        )
+        return "", 0
+
+    # 先输出时长（没有时为 NA），再输出音频流地址
+    url, duration = "", 0
+    for line in stdout.decode(errors="ignore").splitlines():
+        line = line.strip()
+        if line.startswith(("http://", "https://")):
+            url = url or line
+            continue
+        try:
+            duration = duration or float(line)
+        except ValueError:
+            pass
+    if not url:
+        return "", 0
+    return url, duration
+
+
 async def fetch_json_get(url: str, headers: dict, config) -> dict:
     """
     发起 GET 请求获取 JSON 数据
@@ -256,23 +336,20 @@ async def fetch_json_get(url: str, headers: dict, config) -> dict:
     Returns:
         JSON 响应数据字典
     """
-    connector = None
     proxy = None
+    ssl = True
     if config and config.proxy:
-        connector = aiohttp.TCPConnector(
-            ssl=False,  # 如需验证SSL证书，可改为True（需确保代理支持）
-            limit=10,
-        )
         proxy = config.proxy
+        ssl = False  # 如需验证SSL证书，可改为True（需确保代理支持）
     try:
-        # 2. 传入代理配置创建ClientSession
-        async with aiohttp.ClientSession(connector=connector) as session:
-            # 3. 发起带代理的GET请求
+        # 使用共享连接池，代理按请求传入
+        async with cookie_session() as session:
             async with session.get(
                 url,
                 headers=headers,
                 proxy=proxy,  # 传入格式化后的代理参数
-                timeout=10,  # 超时时间（秒），避免无限等待
+                ssl=ssl,
+                timeout=aiohttp.ClientTimeout(total=10),  # 超时时间（秒），避免无限等待
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -296,10 +373,6 @@ async def fetch_json_get(url: str, headers: dict, config) -> dict:
     except Exception as e:
         log.error(f"Unexpected error fetching {url} (proxy: {proxy}): {e}")
         return {}
-    finally:
-        # 4. 关闭连接器（避免资源泄漏）
-        if connector and not connector.closed:
-            await connector.close()
 
 
 class LRUCache(OrderedDict):
@@ -332,6 +405,7 @@ class MusicUrlCache:
         self.cache = LRUCache(max_size)
         self.default_expire_days = default_expire_days
         self.log = logging.getLogger(__name__)
+        self._pending = {}  # 正在请求中的 {url: task}，并发请求同一地址时复用
 
     async def get(self, url: str, headers: dict = None, config=None) -> str:
         """
@@ -351,8 +425,13 @@ class MusicUrlCache:
             self.log.info(f"Using cached url: {cached_url}")
             return cached_url
 
-        # 缓存未命中,请求API
-        return await self._fetch_from_api(url, headers, config)
+        # 缓存未命中,请求API，同一地址同时只请求一次
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_from_api(url, headers, config))
+            self._pending[url] = task
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+        return await asyncio.shield(task)
 
     def _get_from_cache(self, url: str) -> str:
         """从缓存中获取URL"""
@@ -418,6 +497,102 @@ class MusicUrlCache:
         return len(self.cache)
 
 
+class PersistentTTLCache:
+    """带过期时间并持久化到 JSON 文件的 LRU 缓存
+
+    内存中最多保留 max_size 条记录。写入后延迟 save_delay 秒合并落地到文件，
+    重启后可从文件恢复。
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        ttl_sec: float,
+        max_size: int = 1000,
+        save_delay: float = CACHE_SAVE_DELAY_SEC,
+    ):
+        self.filename = filename
+        self.ttl_sec = ttl_sec
+        self.save_delay = save_delay
+        self.cache = LRUCache(max_size)
+        self._dirty = False
+        self._save_handle = None
+        self.load()
+
+    def get(self, key: str, default=None):
+        """获取缓存值，不存在或已过期返回 default"""
+        try:
+            value, expire_time = self.cache[key]
+        except KeyError:
+            return default
+        if time.time() > expire_time:
+            del self.cache[key]
+            return default
+        return value
+
+    def set(self, key: str, value, ttl_sec: float = None):
+        """设置缓存值，延迟落地"""
+        if ttl_sec is None:
+            ttl_sec = self.ttl_sec
+        self.cache[key] = (value, time.time() + ttl_sec)
+        self._dirty = True
+        self._schedule_save()
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有事件循环时直接写入
+            self.flush()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.save_delay, self.flush)
+
+    def flush(self):
+        """立即写入待保存的修改"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            self.save()
+
+    def load(self):
+        """从文件加载缓存，跳过已过期的记录"""
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                data = json.load(f)
+            now = time.time()
+            for key, (value, expire_time) in data.items():
+                if expire_time > now:
+                    self.cache[key] = (value, expire_time)
+            log.info(f"已从【{self.filename}】加载 {len(self.cache)} 条缓存")
+        except Exception as e:
+            log.warning(f"加载缓存文件 {self.filename} 失败: {e}")
+
+    def save(self):
+        """把缓存落地到文件"""
+        if not self.filename:
+            return
+        try:
+            atomic_write_json(self.filename, dict(self.cache))
+        except Exception as e:
+            log.warning(f"保存缓存文件 {self.filename} 失败: {e}")
+
+    def clear(self):
+        """清空内存和文件中的缓存，立即写入"""
+        self.cache.clear()
+        self._dirty = True
+        self.flush()
+
+    @property
+    def size(self) -> int:
+        """当前缓存大小"""
+        return len(self.cache)
+
+
 async def text_to_mp3(
     text: str, save_dir: str, voice: str = "zh-CN-XiaoxiaoNeural"
 ) -> str:
@@ -62,6 +62,86 @@ def find_key_by_partial_string(dictionary: dict[str, str], partial_key: str) ->
     return None
 
 
+class KeywordMatcher:
+    """多关键词匹配器
+
+    用关键词构建 Aho-Corasick 自动机，一次扫描找出文本中出现的所有关键词，
+    耗时只和文本长度有关，不随关键词数量增长。配置变化时重新构建。
+    """
+
+    def __init__(self, keywords: list[str]):
+        """
+        Args:
+            keywords: 关键词列表，顺序即优先级
+        """
+        self.keywords = list(keywords)
+        self._keyword_set = set(self.keywords)
+        # 空关键词在任何文本里都能匹配到，单独处理
+        self._has_empty = "" in self._keyword_set
+        # 每个状态的转移表、失配指针和在该状态结束的关键词下标
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, keyword in enumerate(self.keywords):
+            if keyword:
+                self._add(keyword, index)
+        self._build_fail()
+
+    def __contains__(self, keyword) -> bool:
+        return keyword in self._keyword_set
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, keyword: str, index: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_fail(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state].extend(self._output[fail])
+
+    def find(self, text: str) -> list[tuple[str, int]]:
+        """找出文本中出现的关键词
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            list: [(关键词, 最后一次出现的位置)]，按关键词优先级排序
+        """
+        last_start = {}
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                last_start[index] = pos + 1 - len(self.keywords[index])
+        if self._has_empty:
+            last_start[self.keywords.index("")] = len(text)
+        return [
+            (self.keywords[index], last_start[index]) for index in sorted(last_start)
+        ]
+
+
 def traditional_to_simple(to_convert: str) -> str:
     """繁体转简体"""
     return cc.convert(to_convert)
@@ -25,7 +25,9 @@ from xiaomusic.events import CONFIG_CHANGED, DEVICE_CONFIG_CHANGED, EventBus
 from xiaomusic.file_watcher import FileWatcherManager
 from xiaomusic.music_library import MusicLibrary
 from xiaomusic.online_music import OnlineMusicService
+from xiaomusic.playback_broadcaster import PlaybackBroadcaster
 from xiaomusic.plugin import PluginManager
+from xiaomusic.utils.http_client import http_client
 from xiaomusic.utils.network_utils import downloadfile
 from xiaomusic.utils.system_utils import deepcopy_data_no_sensitive_info
 from xiaomusic.utils.text_utils import chinese_to_number
@@ -127,6 +129,12 @@ class XiaoMusic:
             xiaomusic=self,
         )
 
+        # 播放状态推送（WebSocket）
+        self.playback_broadcaster = PlaybackBroadcaster(
+            device_manager=self.device_manager,
+            event_bus=self.event_bus,
+        )
+
         # 初始化认证管理器（在配置和设备管理器准备好之后）
         self.auth_manager = AuthManager(
             config=self.config,
@@ -143,6 +151,7 @@ class XiaoMusic:
             log=self.log,
             auth_manager=self.auth_manager,
             device_manager=self.device_manager,
+            client=http_client,
         )
 
         # 初始化命令处理器（在所有依赖准备好之后）
@@ -157,7 +166,7 @@ class XiaoMusic:
 
         # 订阅配置变更事件
         self.event_bus.subscribe(CONFIG_CHANGED, self.save_cur_config)
-        self.event_bus.subscribe(DEVICE_CONFIG_CHANGED, self.save_cur_config)
+        self.event_bus.subscribe(DEVICE_CONFIG_CHANGED, self.save_device_state)
 
         debug_config = deepcopy_data_no_sensitive_info(self.config)
         self.log.info(f"Startup OK. {debug_config}")
@@ -333,9 +342,8 @@ class XiaoMusic:
         if url:
             self.log.debug(f"refresh_web_music_list begin url:{url}")
             content = await downloadfile(url)
-            self.config.music_list_json = content
-            # 配置文件落地
-            self.save_cur_config()
+            # 网络歌单保存到歌单数据库
+            self.music_library.import_music_list_json(content)
             self.log.debug(f"refresh_web_music_list url:{url} content:{content}")
         self.log.info(f"refresh_web_music_list ok {url}")
 
@@ -403,11 +411,6 @@ class XiaoMusic:
         """委托给 online_music_service"""
         return await self.online_music_service.search_singer_play(did, search_key, name)
 
-    # 追加歌手歌曲
-    async def add_singer_song(self, list_name, name):
-        """委托给 online_music_service"""
-        return await self.online_music_service.add_singer_song(list_name, name)
-
     # 在线搜索搜索最符合的一首歌并播放
     async def search_top_one_play(self, did, search_key, name):
         """委托给 online_music_service"""
@@ -581,6 +584,26 @@ class XiaoMusic:
     def get_offset_duration(self, did):
         return self.device_manager.devices[did].get_offset_duration()
 
+    # 最近一次播放各阶段耗时
+    def get_play_timings(self, did):
+        return self.device_manager.devices[did].play_timings
+
+    # 所有设备待触发的定时器
+    def get_timers(self):
+        return self.device_manager.timer_scheduler.snapshot()
+
+    # 各分组的播放同步统计
+    def get_group_sync_stats(self):
+        return self.device_manager.get_group_sync_stats()
+
+    # 所有设备的播放状态快照
+    def get_devices_state(self):
+        return self.device_manager.get_playback_states()
+
+    # 共享 HTTP 连接池统计
+    def get_http_stats(self):
+        return http_client.get_stats()
+
     # 当前是否正在播放歌曲
     def isplaying(self, did):
         return self.device_manager.devices[did].is_playing
@@ -593,6 +616,7 @@ class XiaoMusic:
     # 保存配置并重新启动
     async def saveconfig(self, data):
         """保存配置并重新启动"""
+        self.import_playlists_from_setting(data)
         # 更新配置
         self.update_config_from_setting(data)
         # 配置文件落地
@@ -600,11 +624,31 @@ class XiaoMusic:
         # 重新初始化
         await self.reinit()
 
+    # 设置里提交的歌单 JSON 导入歌单数据库，不再放在配置里
+    def import_playlists_from_setting(self, data):
+        content = data.pop("music_list_json", None)
+        if content is not None:
+            self.music_library.import_music_list_json(content)
+        content = data.pop("custom_play_list_json", None)
+        if content is not None:
+            self.music_library.import_custom_play_list_json(content)
+
     # 把当前配置落地
     def save_cur_config(self):
         """把当前配置落地（委托给 config_manager）"""
         self.config_manager.save_cur_config(self.device_manager.devices)
 
+    # 把延迟写入的缓存落地
+    def flush_caches(self):
+        """立即写入延迟保存的网络音乐时长和 audio_id 缓存"""
+        self.music_library.flush_caches()
+        self.device_manager.audio_id_cache.flush()
+
+    # 只把设备播放状态落地
+    def save_device_state(self):
+        """把设备播放状态落地（委托给 config_manager）"""
+        self.config_manager.save_device_state(self.device_manager.devices)
+
     def update_config_from_setting(self, data):
         """从设置更新配置"""
         # 委托给 config_manager 更新配置